@@ -1,10 +1,11 @@
 import streamlit as st
-import pandas as pd
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
-from map import parking_finder_tab
+import profiling
+from map import parking_finder_tab, MAX_DIST_KM
 from diagram import insights_tab
 from fuel_dashboard import fuel_tab
+from refresh import current_parking
+from occupancy import load_occupancy
+from geocode import Geocoder, GeocodeCache, load_plz_centroids
 
 st.set_page_config(
     page_title="SmartPark",
@@ -13,10 +14,12 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv("parking_data.csv", encoding="utf-8")
-    return df.rename(columns={"latitude": "lat", "longitude": "lon"})
+@st.cache_resource
+def get_geocoder():
+    # One client, rate limiter and on-disk cache shared by all sessions
+    geocoder = Geocoder(GeocodeCache(), load_plz_centroids(parking_df=current_parking().frame))
+    profiling.register_counter("nominatim.requests", lambda: geocoder.remote_calls)
+    return geocoder
 
 # Initialize session state
 def init_session_state():
@@ -29,21 +32,16 @@ def init_session_state():
     if "selected_city" not in st.session_state:
         st.session_state.selected_city = None
 
-# Map city names to central coordinates
-CITY_COORDS = {
-    "Berlin": (52.5200, 13.4050),
-    "Frankfurt am Main": (50.1109, 8.6821),
-    "Hamburg": (53.5511, 9.9937),
-    "München": (48.1351, 11.5820),
-    "Köln": (50.9375, 6.9603),
-}
+# Last entry of the city picker; searches then follow the location alone
+NATIONWIDE = "All cities"
 
 # Sidebar for location selection
-def location_sidebar(df):
-    cities = sorted([c for c in df['city'].dropna().unique() if c in CITY_COORDS])
+def location_sidebar(partitions):
+    # Every city in the data, with its center taken from its garages
+    cities = partitions.cities()
     st.sidebar.header("📍 Choose Your City")
-    selected_city = st.sidebar.selectbox("City:", cities, index=0)
-    st.session_state.selected_city = selected_city
+    selected_city = st.sidebar.selectbox("City:", cities + [NATIONWIDE], index=0)
+    st.session_state.selected_city = selected_city if selected_city != NATIONWIDE else None
 
     st.sidebar.header("📍 Choose Your Location")
     location_method = st.sidebar.radio("Select method:", ["City center", "Use coordinates", "Enter address/postal code"], index=0)
@@ -66,14 +64,12 @@ def location_sidebar(df):
             submitted = st.form_submit_button("Search")
             if submitted and address_input:
                 try:
-                    geolocator = Nominatim(user_agent="parking_finder")
-                    geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1)
-                    location = geocode(address_input)
+                    location = get_geocoder().geocode(address_input)
                     if location:
-                        st.session_state.user_lat = location.latitude
-                        st.session_state.user_lon = location.longitude
+                        st.session_state.user_lat = location.lat
+                        st.session_state.user_lon = location.lon
                         st.session_state.page = 1
-                        st.sidebar.success(f"Found location: {location.latitude:.6f}, {location.longitude:.6f}")
+                        st.sidebar.success(f"Found location: {location.lat:.6f}, {location.lon:.6f}")
                         st.rerun()
                     else:
                         st.sidebar.error("Could not find location.")
@@ -82,7 +78,7 @@ def location_sidebar(df):
 
     elif location_method == "City center":
         if st.sidebar.button("🔍 Use city center location"):
-            lat_lon = CITY_COORDS.get(selected_city)
+            lat_lon = partitions.center(selected_city)
             if lat_lon:
                 lat, lon = lat_lon
                 st.session_state.user_lat = lat
@@ -91,31 +87,45 @@ def location_sidebar(df):
                 st.sidebar.success(f"Using city center: {lat:.6f}, {lon:.6f}")
                 st.rerun()
             else:
-                st.sidebar.error(f"No coordinates defined for '{selected_city}'.")
+                st.sidebar.error("Choose a city, or enter coordinates or an address.")
 
-def filter_city(df):
-    # Always filter by selected city for all tabs
-    if "selected_city" in st.session_state and st.session_state.selected_city:
-        return df[df['city'] == st.session_state.selected_city].reset_index(drop=True)
-    return df
+def filter_city(partitions):
+    # The chosen city's partition, plus any other within reach of the user's
+    # location so a search across a city border is complete; NATIONWIDE
+    # (selected_city None) covers every partition
+    city = st.session_state.selected_city
+    if city is None:
+        return partitions.scope(partitions.cities())
+    nearby = partitions.cities_near(st.session_state.user_lat, st.session_state.user_lon, MAX_DIST_KM)
+    return partitions.scope([city, *nearby])
 
 # Main app
 def main():
-    init_session_state()
-    df = load_data()
-    location_sidebar(df)
-    city_df = filter_city(df)
+    with profiling.rerun("main") as trace:
+        # The panel shows the previous rerun; this one is stored for the next
+        profiling.render_panel(st, st.session_state.get("profile_trace"))
+        if trace is not None:
+            st.session_state.profile_trace = trace
+        init_session_state()
+        with profiling.stage("load"):
+            dataset = current_parking()
+            occupancy = load_occupancy()
+        with profiling.stage("sidebar"):
+            location_sidebar(dataset.partitions)
+        with profiling.stage("scope"):
+            scope = filter_city(dataset.partitions)
 
-    st.markdown('<h1 class="main-header">🚗 SmartPark</h1>', unsafe_allow_html=True)
+        st.markdown('<h1 class="main-header">🚗 SmartPark</h1>', unsafe_allow_html=True)
 
-    tab1, tab2, tab3 = st.tabs(["Parking Finder", "Insights", "Fuel Prices"])
+        tab1, tab2, tab3 = st.tabs(["Parking Finder", "Insights", "Fuel Prices"])
 
-    with tab1:
-        parking_finder_tab(df)  # Use df directly, do NOT reload or filter by city here
-    with tab2:
-        insights_tab(df)  # Use df directly, do NOT reload or filter by city here
-    with tab3:
-        fuel_tab()
+        with tab1, profiling.stage("tab.parking"):
+            parking_finder_tab(scope.view(), scope.index, dataset.availability, occupancy,
+                               scope.key, dataset.partitions)  # Own zero-copy view, do NOT reload here
+        with tab2, profiling.stage("tab.insights"):
+            insights_tab(scope.view(), scope.index, occupancy)  # Own zero-copy view, do NOT reload here
+        with tab3, profiling.stage("tab.fuel"):
+            fuel_tab()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,105 @@
+import datetime
+import functools
+import math
+
+import numpy as np
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+
+
+def easter_sunday(year):
+    # Anonymous Gregorian algorithm
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+@functools.lru_cache(maxsize=None)
+def german_holidays(year):
+    """Nationwide German public holidays; state-only holidays are not included."""
+    easter = easter_sunday(year)
+    fixed = [(1, 1), (5, 1), (10, 3), (12, 25), (12, 26)]
+    movable = [-2, 1, 39, 50]  # Good Friday, Easter Monday, Ascension, Whit Monday
+    return frozenset([datetime.date(year, month, day) for month, day in fixed]
+                     + [easter + datetime.timedelta(days=offset) for offset in movable])
+
+
+def is_holiday(date):
+    return date in german_holidays(date.year)
+
+
+def weekly_bitmaps(open_time, close_time, open_weekend):
+    """(garages, WEEK_SLOTS) bool schedule from daily opening hours.
+
+    Hours are whole hours with close_time 24 meaning midnight; a close time
+    at or before the open time runs past midnight. Garages not open on
+    weekends are closed all Saturday and Sunday.
+    """
+    open_slot = np.asarray(open_time, dtype=np.int32)[:, None] * (60 // SLOT_MINUTES)
+    close_slot = np.asarray(close_time, dtype=np.int32)[:, None] * (60 // SLOT_MINUTES)
+    slot = np.arange(SLOTS_PER_DAY)[None, :]
+    same_day = (slot >= open_slot) & (slot < close_slot)
+    overnight = (slot >= open_slot) | (slot < close_slot)
+    day = np.where(close_slot > open_slot, same_day, overnight)
+    week = np.tile(day, 7)
+    weekend = ~np.asarray(open_weekend, dtype=bool)
+    week[weekend, 5 * SLOTS_PER_DAY:] = False
+    return week
+
+
+class AvailabilityIndex:
+    """Answers "open from T for D hours" for every garage at once.
+
+    Garages share few distinct weekly schedules, so only the unique ones are
+    kept, each with a prefix sum of closed slots. A query then costs one
+    subtraction per schedule plus a gather, whatever the stay length.
+    """
+
+    def __init__(self, bitmaps, open_holidays):
+        bitmaps = np.asarray(bitmaps, dtype=bool)
+        schedules, self.schedule_ids = np.unique(bitmaps, axis=0, return_inverse=True)
+        self.schedule_ids = self.schedule_ids.ravel()
+        self.closed_cum = np.zeros((len(schedules), WEEK_SLOTS + 1), dtype=np.int32)
+        np.cumsum(~schedules, axis=1, out=self.closed_cum[:, 1:])
+        self.open_holidays = np.asarray(open_holidays, dtype=bool)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(weekly_bitmaps(df['open_time'].to_numpy(), df['close_time'].to_numpy(),
+                                  df['open_weekend'].to_numpy()),
+                   df['open_holidays'].to_numpy())
+
+    def __len__(self):
+        return len(self.schedule_ids)
+
+    def open_during(self, start, hours):
+        """Bool per garage: open for the whole stay starting at `start`."""
+        slot = start.weekday() * SLOTS_PER_DAY + (start.hour * 60 + start.minute) // SLOT_MINUTES
+        n = max(1, math.ceil(hours * 60 / SLOT_MINUTES))
+        cum = self.closed_cum
+        if n >= WEEK_SLOTS:
+            closed = cum[:, WEEK_SLOTS]
+        elif slot + n <= WEEK_SLOTS:
+            closed = cum[:, slot + n] - cum[:, slot]
+        else:
+            closed = cum[:, WEEK_SLOTS] - cum[:, slot] + cum[:, slot + n - WEEK_SLOTS]
+        is_open = closed[self.schedule_ids] == 0
+        end = start + datetime.timedelta(hours=hours)
+        days = (end.date() - start.date()).days + 1
+        if any(is_holiday(start.date() + datetime.timedelta(days=i)) for i in range(days)):
+            is_open &= self.open_holidays
+        return is_open
+
+
+def hours_label(open_time, close_time):
+    if open_time == 0 and close_time == 24:
+        return "24 hours"
+    return f"{open_time:02d}:00–{close_time % 24:02d}:00"
@@ -0,0 +1,227 @@
+"""End-to-end benchmark: scripted reruns of the whole app through AppTest.
+
+    python benchmarks/bench_app.py [--sizes 1000 100000 1000000] [--repeat 10]
+
+Every size runs in a fresh process against synthetic parking and fuel data
+(see synthetic.py) and the stub OSRM/Nominatim server. All three tabs
+render on every rerun, as they do in the browser. For each scripted
+interaction this reports rerun latency percentiles and the external
+requests it caused, plus the cold start time and the process's peak RSS.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+from stub_server import serve  # noqa: E402
+
+APP = os.path.join(ROOT, "app.py")
+ENDPOINTS = {"route": "osrm.route", "table": "osrm.table", "search": "nominatim.search"}
+
+
+def stub_counts(url):
+    with urllib.request.urlopen(f"{url}/stats") as response:
+        counts = json.load(response)
+    return {label: counts.get(endpoint, 0) for endpoint, label in ENDPOINTS.items()}
+
+
+def sidebar_widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def change_filters(at, i):
+    sidebar_widget(at.sidebar.slider, "Max distance (km)").set_value([2.0, 5.0, 10.0][i % 3])
+    sidebar_widget(at.sidebar.slider, "Fee range (€/h)").set_value((0.0, [3.0, 20.0][i % 2]))
+    sidebar_widget(at.sidebar.checkbox, "EV charging spots").set_value(i % 4 == 3)
+    sidebar_widget(at.sidebar.button, "Apply Filters").click()
+    at.run()
+
+
+def turn_page(at, i):
+    buttons = {b.label: b for b in at.button}
+    forward = buttons["➡️ Next"]
+    (forward if not forward.proto.disabled else buttons["⬅️ Previous"]).click()
+    at.run()
+
+
+def switch_city(at, i):
+    city = sidebar_widget(at.sidebar.selectbox, "City:")
+    city.set_value(city.options[(i + 1) % len(city.options)])
+    at.run()
+    sidebar_widget(at.sidebar.button, "🔍 Use city center location").click()
+    at.run()
+
+
+def show_route(at, i):
+    routes = [b for b in at.button if b.key and b.key.startswith("route_")]
+    routes[i % len(routes)].click()
+    at.run()
+
+
+def trip_cost(at, i):
+    at.button(key="calc_trip").click()
+    at.run()
+
+
+def predict_prices(at, i):
+    at.button(key="predict_prices").click()
+    at.run()
+
+
+def search_address(at, i):
+    # A new query each time, so every search misses the geocode cache and
+    # waits out the geocoder's rate limit like a real lookup would
+    at.sidebar.text_input[0].set_value(f"Benchmarkstraße {i}, Stadt {time.time_ns()}")
+    sidebar_widget(at.sidebar.button, "Search").click()
+    at.run()
+
+
+def use_address_search(at):
+    sidebar_widget(at.sidebar.radio, "Select method:").set_value("Enter address/postal code")
+    at.run()
+
+
+INTERACTIONS = [
+    ("rerun", lambda at, i: at.run()),
+    ("filter", change_filters),
+    ("page", turn_page),
+    ("route", show_route),
+    ("city", switch_city),
+    ("trip_cost", trip_cost),
+    ("forecast", predict_prices),
+    ("address", search_address),
+]
+
+
+def percentiles(samples):
+    ms = np.asarray(samples) * 1000
+    return {"n": len(ms), "p50": float(np.percentile(ms, 50)), "p95": float(np.percentile(ms, 95)),
+            "max": float(ms.max())}
+
+
+def run_worker(args):
+    from streamlit.testing.v1 import AppTest
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    at = AppTest.from_file(APP, default_timeout=600)
+    results = {}
+
+    def measure(name, step, repeat):
+        samples, calls, traced = [], {}, 0
+        for i in range(repeat):
+            before = stub_counts(args.stub)
+            if args.tracemalloc:
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+            step(at, i)
+            samples.append(time.perf_counter() - start)
+            if args.tracemalloc:
+                traced = max(traced, tracemalloc.get_traced_memory()[1])
+            if at.exception:
+                raise RuntimeError(f"{name}: {at.exception[0].value}")
+            for key, value in stub_counts(args.stub).items():
+                calls[key] = calls.get(key, 0) + value - before[key]
+        results[name] = {**percentiles(samples), "calls": calls,
+                         "traced_mb": traced / 2 ** 20 if args.tracemalloc else None}
+
+    measure("cold", lambda at, i: at.run(), 1)
+    for name, step in INTERACTIONS:
+        if name not in args.interactions:
+            continue
+        if name == "address":
+            use_address_search(at)
+        measure(name, step, args.repeat)
+    # ru_maxrss is in KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"garages": args.size, "peak_rss_mb": peak_mb, "interactions": results}))
+
+
+def run_size(args, size, stub_url):
+    from synthetic import write_dataset
+
+    directory = os.path.join(args.data_dir, str(size))
+    if not os.path.exists(os.path.join(directory, ".snapshot", "parking", "meta.json")):
+        start = time.perf_counter()
+        write_dataset(directory, size, years=args.years)
+        print(f"generated {size:,} garages in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    state = tempfile.mkdtemp(prefix="bench_app_")
+    env = {
+        **os.environ,
+        "SMARTPARK_PARKING_CSV": os.path.join(directory, "parking_data.csv"),
+        "SMARTPARK_FUEL_CSV": os.path.join(directory, "fuel_price.csv"),
+        "SMARTPARK_SNAPSHOT_DIR": os.path.join(directory, ".snapshot"),
+        "SMARTPARK_GEOCODE_DB": os.path.join(state, "geocode.sqlite"),
+        "SMARTPARK_RESULT_DB": "",
+        "SMARTPARK_REFRESH": "0",
+        "SMARTPARK_OCCUPANCY_FEED": args.feed,
+        "OSRM_URL": stub_url,
+        "SMARTPARK_NOMINATIM_URL": stub_url,
+    }
+    command = [sys.executable, __file__, "--worker", "--size", str(size), "--stub", stub_url,
+               "--repeat", str(args.repeat), "--interactions", *args.interactions]
+    if args.tracemalloc:
+        command.append("--tracemalloc")
+    out = subprocess.run(command, env=env, cwd=ROOT, capture_output=True, text=True)
+    if out.returncode != 0:
+        sys.stderr.write(out.stderr)
+        raise SystemExit(f"benchmark for {size:,} garages failed")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def report(result):
+    print(f"\n{result['garages']:,} garages, peak RSS {result['peak_rss_mb']:.0f} MB")
+    print(f"{'interaction':>12} {'n':>4} {'p50 (ms)':>10} {'p95 (ms)':>10} {'max (ms)':>10} "
+          f"{'traced MB':>10}  external calls")
+    for name, row in result["interactions"].items():
+        calls = ", ".join(f"{k}={v}" for k, v in row["calls"].items() if v) or "-"
+        traced = f"{row['traced_mb']:.1f}" if row["traced_mb"] is not None else "-"
+        print(f"{name:>12} {row['n']:>4} {row['p50']:>10.1f} {row['p95']:>10.1f} {row['max']:>10.1f} "
+              f"{traced:>10}  {calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--years", type=float, default=5, help="length of the fuel history")
+    parser.add_argument("--interactions", nargs="+", default=[name for name, _ in INTERACTIONS],
+                        choices=[name for name, _ in INTERACTIONS])
+    parser.add_argument("--feed", default="", help="occupancy feed, e.g. stub")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="also report peak Python allocations per interaction (slower)")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, ".cache", "bench"),
+                        help="where generated datasets are kept between runs")
+    parser.add_argument("--json", help="also write the raw results to this file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--stub", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+    server = serve()
+    stub_url = f"http://127.0.0.1:{server.server_address[1]}"
+    results = []
+    for size in args.sizes:
+        results.append(run_size(args, size, stub_url))
+        report(results[-1])
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
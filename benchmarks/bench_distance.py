@@ -0,0 +1,64 @@
+"""Micro-benchmark: row-wise haversine vs. the vectorized kernel in geo.py.
+
+    python benchmarks/bench_distance.py [--sizes 100 10000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+from math import radians, sin, cos, sqrt, atan2
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from geo import distances_from, distance_matrix  # noqa: E402
+
+
+def scalar_haversine(lat1, lon1, lat2, lon2):
+    # The per-row implementation previously used by map.filter_data
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+
+def garages(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "lat": rng.uniform(47.3, 55.0, n),
+        "lon": rng.uniform(5.9, 15.0, n),
+    })
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 1_000_000])
+    parser.add_argument("--origins", type=int, default=100, help="origins for the matrix case")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lat, lon = 50.1109, 8.6821
+    print(f"{'garages':>10} {'apply (ms)':>12} {'numpy (ms)':>12} {'speedup':>9} {'matrix (ms)':>13}")
+    for n in args.sizes:
+        df = garages(n)
+        # The row-wise path is slow enough that one run is representative at 1M
+        apply_s = best_of(lambda: df.apply(lambda r: scalar_haversine(lat, lon, r["lat"], r["lon"]), axis=1),
+                          1 if n >= 100_000 else args.repeat)
+        numpy_s = best_of(lambda: distances_from(lat, lon, df), args.repeat)
+        origins = garages(args.origins, seed=1)
+        matrix_s = best_of(lambda: distance_matrix(origins["lat"], origins["lon"], df["lat"], df["lon"]), 1)
+        print(f"{n:>10,} {apply_s * 1e3:>12.2f} {numpy_s * 1e3:>12.3f} {apply_s / numpy_s:>8.0f}x "
+              f"{matrix_s * 1e3:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
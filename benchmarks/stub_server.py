@@ -0,0 +1,129 @@
+"""Offline stand-in for the OSRM and Nominatim HTTP APIs.
+
+Serves /route and /table responses computed from straight-line distance,
+with points outside Germany unroutable like they are for a German OSRM
+extract (400 NoRoute for /route, null legs in /table), and /search results at a fixed pseudo-random point in Germany per query, so
+the app and benchmarks can run without network access:
+
+    python benchmarks/stub_server.py --port 5001
+    OSRM_URL=http://127.0.0.1:5001 SMARTPARK_NOMINATIM_URL=http://127.0.0.1:5001 streamlit run app.py
+
+GET /stats returns the number of requests served per endpoint, and
+GET /unavailable answers 503 like an overloaded server.
+"""
+import argparse
+import hashlib
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from math import radians, sin, cos, sqrt, atan2
+from urllib.parse import urlsplit, parse_qs
+
+ROAD_FACTOR = 1.3   # road distance vs. great-circle distance
+SPEED_KMH = 30.0    # average urban driving speed
+GERMANY = (47.3, 55.0, 5.9, 15.0)  # lat/lon bounding box for geocoding results
+
+
+def _km(lon1, lat1, lon2, lat2):
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+
+def _leg(a, b):
+    km = _km(*a, *b) * ROAD_FACTOR
+    return km * 1000, km / SPEED_KMH * 3600
+
+
+def _place(query):
+    # Same query, same point, in every process
+    digest = hashlib.sha1(query.strip().lower().encode()).digest()
+    south, north, west, east = GERMANY
+    lat = south + (north - south) * int.from_bytes(digest[:4], "big") / 2 ** 32
+    lon = west + (east - west) * int.from_bytes(digest[4:8], "big") / 2 ** 32
+    return lat, lon
+
+
+def _routable(point):
+    lon, lat = point
+    south, north, west, east = GERMANY
+    return south <= lat <= north and west <= lon <= east
+
+
+def _coords(segment):
+    return [tuple(map(float, pair.split(","))) for pair in segment.split(";")]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    counts = Counter()
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        with self.lock:
+            self.counts[parts[0]] += 1
+        if parts[0] == "stats":
+            self._send(dict(self.counts))
+        elif parts[0] == "unavailable":
+            self._send({"code": "Unavailable", "message": "try again later"}, status=503)
+        elif parts[0] == "route" and len(parts) == 4:
+            start, end = _coords(parts[3])[:2]
+            if not (_routable(start) and _routable(end)):
+                self._send({"code": "NoRoute", "message": "Impossible route between points"}, status=400)
+                return
+            dist, dur = _leg(start, end)
+            self._send({"code": "Ok", "routes": [{
+                "distance": dist,
+                "duration": dur,
+                "geometry": {"type": "LineString", "coordinates": [list(start), list(end)]},
+            }]})
+        elif parts[0] == "table" and len(parts) == 4:
+            coords = _coords(parts[3])
+            legs = [_leg(coords[0], c) if _routable(coords[0]) and _routable(c) else (None, None)
+                    for c in coords]
+            self._send({
+                "code": "Ok",
+                "distances": [[d for d, _ in legs]],
+                "durations": [[t for _, t in legs]],
+            })
+        elif parts[0] == "search":
+            query = parse_qs(url.query).get("q", [""])[0]
+            if not query.strip():
+                self._send([])
+                return
+            lat, lon = _place(query)
+            self._send([{"place_id": int(hashlib.sha1(query.encode()).hexdigest()[:8], 16),
+                         "lat": f"{lat:.7f}", "lon": f"{lon:.7f}", "display_name": query,
+                         "boundingbox": [f"{lat - 0.001:.7f}", f"{lat + 0.001:.7f}",
+                                         f"{lon - 0.001:.7f}", f"{lon + 0.001:.7f}"]}])
+        else:
+            self._send({"code": "InvalidUrl", "message": url.path}, status=400)
+
+
+def serve(host="127.0.0.1", port=0):
+    """Start the stub in a daemon thread and return the server."""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    args = parser.parse_args()
+    print(f"Stub OSRM/Nominatim listening on http://{args.host}:{args.port}")
+    ThreadingHTTPServer((args.host, args.port), StubHandler).serve_forever()
@@ -0,0 +1,268 @@
+"""Deterministic synthetic parking and fuel data in the app's input formats.
+
+Garages have exactly the columns of parking_data.csv. They cluster around
+each city's centre and a handful of district centres, with more garages in
+bigger cities. Fees fall off with distance from the centre, and opening
+hours, EV charging and capacity follow the mix seen in the real data. The
+fuel history is a daily national series plus one series per city, written
+as fuel_price.csv and the fuel_ingest store:
+
+    python benchmarks/synthetic.py --garages 1000000 --out .cache/bench/1000000
+    SMARTPARK_PARKING_CSV=.cache/bench/1000000/parking_data.csv \\
+    SMARTPARK_FUEL_CSV=.cache/bench/1000000/fuel_price.csv \\
+    SMARTPARK_SNAPSHOT_DIR=.cache/bench/1000000/.snapshot streamlit run app.py
+
+The same --garages and --seed always give the same rows. Garages are
+generated in fixed-size chunks, so CSV output streams in bounded memory;
+--format snapshot skips the parking CSV (the app then reads the snapshot
+alone), but builds the whole table in memory first.
+"""
+import argparse
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from data import prepare_parking, read_fuel_csv  # noqa: E402
+from fuel_ingest import FUEL_COLUMNS, write_store  # noqa: E402
+from snapshot import write_snapshot  # noqa: E402
+
+# name: (lat, lon, population in thousands, first and last PLZ prefix, fee level in €/h);
+# the first five are the cities in parking_data.csv
+CITIES = {
+    "Berlin": (52.5200, 13.4050, 3700, 10, 14, 3.0),
+    "Frankfurt am Main": (50.1109, 8.6821, 760, 60, 65, 3.5),
+    "Hamburg": (53.5511, 9.9937, 1900, 20, 22, 3.0),
+    "München": (48.1351, 11.5820, 1500, 80, 81, 4.0),
+    "Köln": (50.9375, 6.9603, 1080, 50, 51, 3.0),
+    "Stuttgart": (48.7758, 9.1829, 630, 70, 70, 3.5),
+    "Düsseldorf": (51.2277, 6.7735, 620, 40, 40, 3.0),
+    "Leipzig": (51.3397, 12.3731, 600, 4, 4, 2.0),
+    "Dortmund": (51.5136, 7.4653, 590, 44, 44, 2.0),
+    "Essen": (51.4556, 7.0116, 580, 45, 45, 2.0),
+    "Bremen": (53.0793, 8.8017, 570, 28, 28, 2.0),
+    "Dresden": (51.0504, 13.7373, 560, 1, 1, 2.0),
+    "Hannover": (52.3759, 9.7320, 540, 30, 30, 2.5),
+    "Nürnberg": (49.4521, 11.0767, 520, 90, 90, 2.5),
+    "Duisburg": (51.4344, 6.7623, 500, 47, 47, 1.5),
+    "Bochum": (51.4818, 7.2162, 360, 44, 44, 1.5),
+    "Wuppertal": (51.2562, 7.1508, 350, 42, 42, 1.5),
+    "Bielefeld": (52.0302, 8.5325, 330, 33, 33, 1.5),
+    "Bonn": (50.7374, 7.0982, 330, 53, 53, 2.0),
+    "Münster": (51.9607, 7.6261, 320, 48, 48, 2.0),
+    "Mannheim": (49.4875, 8.4660, 310, 68, 68, 2.0),
+    "Karlsruhe": (49.0069, 8.4037, 300, 76, 76, 2.0),
+    "Augsburg": (48.3705, 10.8978, 300, 86, 86, 2.0),
+    "Wiesbaden": (50.0782, 8.2398, 280, 65, 65, 2.0),
+    "Mainz": (49.9929, 8.2473, 220, 55, 55, 2.0),
+    "Kiel": (54.3233, 10.1228, 250, 24, 24, 1.5),
+    "Freiburg im Breisgau": (47.9990, 7.8421, 230, 79, 79, 2.5),
+    "Rostock": (54.0924, 12.0991, 210, 18, 18, 1.5),
+    "Kassel": (51.3127, 9.4797, 200, 34, 34, 1.5),
+    "Erfurt": (50.9848, 11.0299, 210, 99, 99, 1.5),
+}
+PARKING_COLUMNS = ['city', 'name', 'address', 'postal_code', 'latitude', 'longitude', 'open_weekend',
+                   'open_holidays', 'open_time', 'close_time', 'fee_per_hour', 'cashless_payment',
+                   'ev_charging', 'total_spots', 'source_url']
+KINDS = np.array(["Parkhaus", "Tiefgarage", "Parkplatz", "P+R"])
+KIND_WEIGHTS = [0.45, 0.35, 0.15, 0.05]
+STREETS = np.array(["Hauptstraße", "Bahnhofstraße", "Schillerstraße", "Goethestraße", "Marktplatz",
+                    "Kirchstraße", "Gartenstraße", "Friedrichstraße", "Lindenstraße", "Am Ring",
+                    "Berliner Straße", "Ringstraße", "Poststraße", "Schulstraße", "Domplatz",
+                    "Mühlenweg", "Industriestraße", "Rathausplatz", "Hafenstraße", "Kaiserstraße"])
+DISTRICTS = 8
+CHUNK = 250_000
+KM_PER_DEG_LAT = 111.32
+
+
+def _slug(text):
+    text = text.lower().translate(str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"}))
+    return re.sub(r"[^a-z0-9]+", "-", text).strip("-")
+
+
+def city_layout(seed=0, cities=CITIES):
+    """Per city, district centres as km offsets from the centre and their weights."""
+    layout = {}
+    for i, city in enumerate(cities):
+        rng = np.random.default_rng([seed, 0, i])
+        scale = np.sqrt(cities[city][2] / 500)
+        # District 0 is the centre itself and gets the most garages
+        offsets = np.vstack([[0.0, 0.0], rng.normal(0, 4.0 * scale, (DISTRICTS - 1, 2))])
+        weights = np.concatenate([[3.0], rng.uniform(0.5, 1.5, DISTRICTS - 1)])
+        spread = np.concatenate([[1.0 * scale], rng.uniform(0.4, 0.9, DISTRICTS - 1) * scale])
+        layout[city] = (offsets, weights / weights.sum(), spread)
+    return layout
+
+
+def parking_chunk(start, n, seed=0, cities=CITIES, layout=None):
+    """Rows start..start+n-1 of the dataset, as parking_data.csv columns."""
+    layout = layout or city_layout(seed, cities)
+    rng = np.random.default_rng([seed, 1, start])
+    names = list(cities)
+    table = np.array([cities[c][:3] + cities[c][5:] for c in names], dtype=float)
+    city = rng.choice(len(names), n, p=table[:, 2] / table[:, 2].sum())
+
+    # Position: a district of the city, then a normal scatter around it, in km
+    x, y, district = np.empty(n), np.empty(n), np.empty(n, dtype=int)
+    for c in np.unique(city):
+        rows = np.flatnonzero(city == c)
+        offsets, weights, spread = layout[names[c]]
+        district[rows] = rng.choice(len(weights), len(rows), p=weights)
+        x[rows] = offsets[district[rows], 0] + rng.normal(0, 1, len(rows)) * spread[district[rows]]
+        y[rows] = offsets[district[rows], 1] + rng.normal(0, 1, len(rows)) * spread[district[rows]]
+    lat = table[city, 0] + y / KM_PER_DEG_LAT
+    lon = table[city, 1] + x / (KM_PER_DEG_LAT * np.cos(np.radians(table[city, 0])))
+    centre_km = np.hypot(x, y)
+
+    # Fees fall off from the centre; airports and premium garages make the long tail
+    fee = table[city, 3] * (0.35 + np.exp(-centre_km / 5)) * rng.lognormal(0, 0.3, n)
+    fee = np.where(rng.random(n) < 0.01, fee * 3, fee)
+    fee = np.clip(np.round(fee * 2) / 2, 0.5, 20.0)
+
+    always_open = rng.random(n) < 0.82
+    open_time = np.where(always_open, 0, rng.choice([6, 7, 8, 9], n))
+    close_time = np.where(always_open, 24, rng.choice([20, 21, 22, 23], n))
+    open_weekend = always_open | (rng.random(n) < 0.6)
+    open_holidays = open_weekend & (rng.random(n) < 0.97)
+
+    spots = np.clip(rng.lognormal(np.log(300), 0.75, n), 16, 3500).astype(int)
+    has_ev = rng.random(n) < np.where(spots > 300, 0.45, 0.2)
+    ev = np.where(has_ev, np.clip(np.round(spots * rng.uniform(0.01, 0.08, n)), 1, 50), 0).astype(int)
+
+    kind = KINDS[rng.choice(len(KINDS), n, p=KIND_WEIGHTS)]
+    street = STREETS[rng.integers(0, len(STREETS), n)]
+    number = rng.integers(1, 200, n)
+    lo = np.array([cities[c][3] for c in names])[city]
+    hi = np.array([cities[c][4] for c in names])[city]
+    prefix = lo + (rng.random(n) * (hi - lo + 1)).astype(int)
+    plz = prefix * 1000 + rng.integers(0, 1000, n)
+    ids = np.arange(start, start + n)
+    city_names = np.array(names)[city]
+    slugs = {c: _slug(c) for c in names}
+    return pd.DataFrame({
+        'city': city_names,
+        'name': [f"{k} {s} {i}" for k, s, i in zip(kind, street, ids)],
+        'address': [f"{s} {no}, {p:05d} {c}" for s, no, p, c in zip(street, number, plz, city_names)],
+        'postal_code': [f"{p:05d}" for p in plz],
+        'latitude': lat.round(7),
+        'longitude': lon.round(7),
+        'open_weekend': open_weekend,
+        'open_holidays': open_holidays,
+        'open_time': open_time,
+        'close_time': close_time,
+        'fee_per_hour': fee,
+        'cashless_payment': rng.random(n) < 0.83,
+        'ev_charging': ev,
+        'total_spots': spots,
+        'source_url': [f"https://example.invalid/parken-in-{slugs[c]}/{_slug(k)}-{i}"
+                       for c, k, i in zip(city_names, kind, ids)],
+    }, columns=PARKING_COLUMNS)
+
+
+def parking_chunks(n, seed=0, cities=CITIES, chunk=CHUNK):
+    layout = city_layout(seed, cities)
+    for start in range(0, n, chunk):
+        yield parking_chunk(start, min(chunk, n - start), seed, cities, layout)
+
+
+def parking_frame(n, seed=0, cities=CITIES):
+    """n garages with the columns of parking_data.csv."""
+    return pd.concat(parking_chunks(n, seed, cities), ignore_index=True)
+
+
+def fuel_frame(years, seed=0, end="2025-06-30"):
+    """Daily national prices in the layout of fuel_price.csv, up to `end`."""
+    rng = np.random.default_rng([seed, 2])
+    dates = pd.date_range(end=end, periods=int(years * 365), freq="D")
+    # Mean-reverting crude price plus a yearly cycle and cheaper weekends
+    level = np.empty(len(dates))
+    level[0] = 0.0
+    shocks = rng.normal(0, 0.012, len(dates))
+    for i in range(1, len(dates)):
+        level[i] = 0.995 * level[i - 1] + shocks[i]
+    season = 0.04 * np.sin(2 * np.pi * (dates.dayofyear.to_numpy() - 80) / 365.25)
+    weekday = np.where(dates.dayofweek.to_numpy() >= 5, -0.01, 0.0)
+    e10 = 1.70 + level + season + weekday
+    return pd.DataFrame({
+        'Super E10': e10,
+        'Diesel': e10 - 0.08 + 0.5 * level + rng.normal(0, 0.004, len(dates)),
+        'Super E5': e10 + 0.06 + rng.normal(0, 0.003, len(dates)),
+    }, index=pd.Index(dates, name='Datum')).clip(lower=0.8).round(2)
+
+
+def city_fuel_frame(national, seed=0, cities=CITIES):
+    """Per-city prices as a (city, date)-indexed frame in the fuel_ingest store layout."""
+    frames = {}
+    for i, city in enumerate(cities):
+        rng = np.random.default_rng([seed, 3, i])
+        # A fixed local premium plus day-to-day noise of the city's station mix
+        offset = rng.normal(0, 0.025)
+        noise = rng.normal(0, 0.008, national.shape)
+        frames[city] = (national + offset + noise).round(3)
+    means = pd.concat(frames, names=['city', 'date']).astype('float32')
+    return means[list(FUEL_COLUMNS.values())]
+
+
+def to_csv_rows(df):
+    out = df.copy()
+    for col in ['open_weekend', 'open_holidays', 'cashless_payment']:
+        out[col] = np.where(out[col], "TRUE", "FALSE")
+    return out
+
+
+def write_parking_csv(chunks, path):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for i, chunk in enumerate(chunks):
+            to_csv_rows(chunk).to_csv(f, index=False, header=i == 0)
+
+
+def write_fuel_csv(df, path):
+    df.to_csv(path, sep=";", decimal=",", float_format="%.2f", date_format="%Y-%m-%d")
+
+
+def write_dataset(directory, garages, years=5, seed=0, fmt="both"):
+    """Write parking and fuel data; returns (parking_csv, fuel_csv, snapshot_dir).
+
+    fmt is "csv", "snapshot" or "both". With "snapshot" the parking CSV is
+    not written and its path only names the source the snapshot stands for.
+    """
+    os.makedirs(directory, exist_ok=True)
+    parking_csv = os.path.join(directory, "parking_data.csv")
+    fuel_csv = os.path.join(directory, "fuel_price.csv")
+    snapshot_dir = os.path.join(directory, ".snapshot")
+    if fmt == "snapshot":
+        if os.path.exists(parking_csv):
+            os.remove(parking_csv)
+        write_snapshot(prepare_parking(parking_frame(garages, seed)), "parking", parking_csv, snapshot_dir)
+    else:
+        write_parking_csv(parking_chunks(garages, seed), parking_csv)
+        if fmt == "both":
+            from data import read_parking_csv
+            write_snapshot(read_parking_csv(parking_csv), "parking", parking_csv, snapshot_dir)
+
+    # The fuel history is small, so it is always written as CSV too
+    national = fuel_frame(years, seed)
+    write_fuel_csv(national, fuel_csv)
+    if fmt != "csv":
+        write_snapshot(read_fuel_csv(fuel_csv), "fuel", fuel_csv, snapshot_dir)
+    write_store(city_fuel_frame(national, seed), fuel_csv, snapshot_dir)
+    return parking_csv, fuel_csv, snapshot_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--garages", type=int, default=100_000)
+    parser.add_argument("--years", type=float, default=5, help="length of the fuel history")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["csv", "snapshot", "both"], default="both")
+    parser.add_argument("--out", required=True, help="output directory")
+    args = parser.parse_args()
+    for path in write_dataset(args.out, args.garages, args.years, args.seed, args.format):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
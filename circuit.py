@@ -0,0 +1,86 @@
+import threading
+import time
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream errors.
+
+    After `threshold` consecutive failures the circuit opens and calls raise
+    CircuitOpen without touching the upstream. Once `reset_after` seconds
+    have passed a single trial call is let through; success closes the
+    circuit again, failure re-opens it.
+    """
+
+    def __init__(self, name, threshold=3, reset_after=30.0):
+        self.name = name
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_after or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+    def call(self, fn, *args, errors=(Exception,), **kwargs):
+        """fn(*args, **kwargs) guarded by the breaker; only `errors` count as failures."""
+        if not self.allow():
+            raise CircuitOpen(f"{self.name} is unavailable, retrying later")
+        try:
+            result = fn(*args, **kwargs)
+        except errors:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Not an upstream failure, but give the next caller the trial
+            with self._lock:
+                self._trial = False
+            raise
+        self.record_success()
+        return result
+
+
+def with_retries(fn, attempts=3, backoff=0.5, errors=(Exception,)):
+    """Call fn until it succeeds, sleeping backoff * 2**n between attempts.
+
+    CircuitOpen is never retried.
+    """
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except CircuitOpen:
+            raise
+        except errors:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(backoff * 2 ** attempt)
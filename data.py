@@ -0,0 +1,143 @@
+import hashlib
+import io
+import os
+
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+from partitions import ParkingPartitions, frame_view
+from availability import AvailabilityIndex
+from snapshot import load_or_read
+from fuel_ingest import read_store
+
+PARKING_CSV = os.environ.get("SMARTPARK_PARKING_CSV", "parking_data.csv")
+FUEL_CSV = os.environ.get("SMARTPARK_FUEL_CSV", "fuel_price.csv")
+
+PARKING_DTYPES = {
+    'city': 'category',
+    'name': 'string',
+    'address': 'string',
+    'postal_code': 'string',
+    'latitude': 'float32',
+    'longitude': 'float32',
+    'open_time': 'int16',
+    'close_time': 'int16',
+    'fee_per_hour': 'float64',
+    'ev_charging': 'int16',
+    'total_spots': 'int16',
+    'source_url': 'string',
+}
+BOOL_COLUMNS = ['open_weekend', 'open_holidays', 'cashless_payment']
+RENAMED = {'latitude': 'lat', 'longitude': 'lon'}
+# The frame read_parking_csv returns; snapshots that differ are rebuilt from the CSV
+PARKING_SCHEMA = {
+    **{RENAMED.get(col, col): dtype for col, dtype in PARKING_DTYPES.items()},
+    **{col: 'bool' for col in BOOL_COLUMNS},
+    'garage_id': 'int32',
+    'garage_key': 'int64',
+    'has_ev': 'bool',
+}
+# Everything the parking filters and sort read
+FINGERPRINT_COLUMNS = ['lat', 'lon', 'fee_per_hour', 'has_ev', 'cashless_payment', 'open_weekend',
+                       'open_holidays', 'open_time', 'close_time']
+
+
+def read_parking_csv(path=PARKING_CSV):
+    return prepare_parking(pd.read_csv(path, encoding="utf-8", dtype=PARKING_DTYPES))
+
+
+def prepare_parking(df):
+    # Columns as in parking_data.csv -> the frame the app works on
+    df = df.astype(PARKING_DTYPES).rename(columns=RENAMED)
+    for col in BOOL_COLUMNS:
+        df[col] = df[col].fillna(False).astype(bool)
+    return add_derived_columns(df)
+
+
+def garage_keys(df):
+    """Stable 64-bit id per garage, hashed from its source URL (or city, name and address)."""
+    identity = df['source_url'].fillna(df['city'].astype('string') + '|' + df['name'] + '|' + df['address'])
+    return pd.util.hash_pandas_object(identity, index=False).to_numpy().view(np.int64)
+
+
+def add_derived_columns(df):
+    # garage_id is the row position, for arrays built alongside this frame;
+    # garage_key survives reloads and reordering, for feeds and shared caches
+    df['garage_id'] = np.arange(len(df), dtype=np.int32)
+    df['garage_key'] = garage_keys(df)
+    df['has_ev'] = df['ev_charging'] > 0
+    return df
+
+
+def read_parking(path=PARKING_CSV):
+    # Memory-mapped snapshot when one matches the CSV, CSV parse otherwise
+    return load_or_read("parking", path, read_parking_csv, dtypes=PARKING_SCHEMA)
+
+
+def read_fuel_csv(path=FUEL_CSV):
+    df = pd.read_csv(path, sep=";", decimal=",", parse_dates=['Datum'])
+    df = df.rename(columns={'Datum': 'date'}).set_index('date')
+    return df[['Super E10', 'Diesel', 'Super E5']].astype('float64')
+
+
+def read_fuel(path=FUEL_CSV):
+    return load_or_read("fuel", path, read_fuel_csv)
+
+
+def read_fuel_latest(path=FUEL_CSV, tail_bytes=4096):
+    """Last row of the fuel CSV as a Series named by its date.
+
+    Only the header and the final few KB are read, so this stays cheap no
+    matter how long the history is. The CSV is in date order.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(len(header), size - tail_bytes))
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    tail = pd.read_csv(io.BytesIO(header + lines[-1] + b"\n"), sep=";", decimal=",", parse_dates=['Datum'])
+    row = tail.iloc[-1]
+    return row[['Super E10', 'Diesel', 'Super E5']].astype('float64').rename(row['Datum'])
+
+
+@st.cache_resource
+def load_city_fuel():
+    # Per-city series written by fuel_ingest.py; empty until it has run
+    return {city.casefold(): series for city, series in read_store().items()}
+
+
+def read_city_fuel(city):
+    """Date-indexed prices for one city, or None if the store has no such city."""
+    if not city:
+        return None
+    return load_city_fuel().get(city.strip().casefold())
+
+
+def fingerprint(df, columns=FINGERPRINT_COLUMNS):
+    # Content hash of the columns results depend on; equal across processes for equal data
+    digest = hashlib.sha1()
+    for col in columns:
+        digest.update(np.ascontiguousarray(df[col].to_numpy()).tobytes())
+    return digest.hexdigest()
+
+
+class ParkingDataset:
+    """The parking table plus its per-city partitions and opening-hours index, loaded once per process."""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.fingerprint = fingerprint(frame)
+        self.partitions = ParkingPartitions(frame, key=self.fingerprint)
+        self.availability = AvailabilityIndex.from_frame(frame)
+
+    def view(self):
+        return frame_view(self.frame)
+
+    def __len__(self):
+        return len(self.frame)
+
+
+@st.cache_resource
+def load_parking():
+    return ParkingDataset(read_parking())
@@ -3,34 +3,17 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import random
-from math import radians, sin, cos, sqrt, atan2
 from map import load_parking_data
+from geo import distances_from
+from fuel_service import get_fuel_service
+from trip_cost import TripCosts
+from occupancy import with_free_spots
+import profiling
 
-@st.cache_data
-def load_fuel_prices():
-    # Read the CSV data directly without skipping rows
-    df = pd.read_csv("fuel_price.csv", sep=";")
-    
-    # Rename columns
-    df = df.rename(columns={'Datum': 'date', 'Super E10': 'e10', 'Diesel': 'diesel', 'Super E5': 'e5'})
-    df['date'] = pd.to_datetime(df['date'])
-
-    # Convert comma decimal separators to dots and cast to float
-    for col in ['e10', 'diesel', 'e5']:
-        df[col] = df[col].str.replace(',', '.', regex=False).astype(float)
-
-    # Set date as index
-    df = df.set_index('date')
-
-    # Rename columns to match the expected output
-    df = df.rename(columns={
-        'e10': 'Super E10',
-        'diesel': 'Diesel',
-        'e5': 'Super E5'
-    })
-
-    return df
+# Garages listed by the trip calculator
+TOP_K = 5
 
+@profiling.traced("insights.gauge")
 def create_apple_gauge(value, max_value, color, title):
     fig = go.Figure(go.Indicator(
         mode = "gauge+number",
@@ -62,6 +45,24 @@ def create_apple_gauge(value, max_value, color, title):
     )
     return fig
 
+# g CO₂ per km, gauge title and color for each mode of transport, in display order
+CO2_DATA = {
+    'Car (Gasoline)': (120, 'Gasoline Car', '#FF453A'),
+    'Car (Diesel)': (110, 'Diesel Car', '#FFD60A'),
+    'Electric Car': (30, 'Electric Car', '#30D158'),
+    'Hybrid Car': (80, 'Hybrid Car', '#FFD60A'),
+    'Public Transport': (25, 'Public Transport', '#30D158'),
+    'E-Scooter': (15, 'E-Scooter', '#30D158'),
+    'Bicycle': (0, 'Bicycle', '#30D158'),
+    'Walking': (0, 'Walking', '#30D158'),
+}
+CO2_GAUGE_MAX = 150
+
+@st.cache_resource
+def co2_gauges():
+    # Constant, so built once per process; st.plotly_chart only reads the figures
+    return [create_apple_gauge(value, CO2_GAUGE_MAX, color, title) for value, title, color in CO2_DATA.values()]
+
 def get_fun_fact():
     facts = [
         "🚗 The average car spends 95% of its time parked!",
@@ -75,195 +76,84 @@ def get_fun_fact():
     ]
     return random.choice(facts)
 
-def haversine(lat1, lon1, lat2, lon2):
-    try:
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        dlon, dlat = lon2 - lon1, lat2 - lat1
-        a = sin(dlat/2)**2 + cos(lat1)*cos(lat2)*sin(dlon/2)**2
-        return 6371 * 2 * atan2(sqrt(a), sqrt(1-a))
-    except:
-        return float('inf')
-
-def filter_df(df, user_location, max_dist, fee_range, ev_only):
+@profiling.traced("insights.filter")
+def filter_df(df, user_location, max_dist, fee_range, ev_only, index=None):
     if df.empty:
         return df
 
-    df['distance'] = df.apply(lambda r: haversine(user_location[0], user_location[1], r['lat'], r['lon']), axis=1)
-    df = df[df['distance'] <= max_dist]
+    if index is not None and len(index) == len(df):
+        positions, distances = index.within(user_location[0], user_location[1], max_dist)
+        df = df.iloc[positions].assign(distance=distances)
+    else:
+        df = df.assign(distance=distances_from(user_location[0], user_location[1], df))
+        df = df[df['distance'] <= max_dist]
     df = df[df['fee_per_hour'].between(fee_range[0], fee_range[1])]
 
     if ev_only:
-        df = df[df['ev_charging'] > 0]
+        df = df[df['has_ev']]
 
     return df.sort_values('distance').reset_index(drop=True)
 
+def comparison_bar(df, column, label, color_scale):
+    fig = px.bar(df, x='name', y=column,
+                labels={column: label, 'name': 'Parking Location'},
+                color=column,
+                color_continuous_scale=color_scale)
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font={'family': 'SF Pro Display, sans-serif'},
+        xaxis_tickangle=-45
+    )
+    return fig
+
+@st.cache_resource(max_entries=256, ttl=600)
+def comparison_figures(rows, spots, spots_label):
+    # Keyed on the plotted rows, so reruns and sessions showing the same garages reuse the figures
+    df = pd.DataFrame(list(rows), columns=['name', 'fee_per_hour', 'distance', spots])
+    return (comparison_bar(df, 'fee_per_hour', 'Fee (€/hour)', 'Oranges'),
+            comparison_bar(df, 'distance', 'Distance (km)', 'Greens'),
+            comparison_bar(df, spots, spots_label, 'Blues'))
+
+@profiling.traced("insights.charts")
 def show_comparison_charts(filtered_df):
     if filtered_df.empty:
         st.warning("No data to display.")
         return
 
-    top5 = filtered_df.head(5)    
+    top5 = filtered_df.head(5)
+    # Spots Available; live free spots when the occupancy feed knows them, capacity otherwise
+    live = 'free_spots' in top5 and (top5['free_spots'] >= 0).any()
+    spots = 'free_spots' if live else 'total_spots'
+    rows = tuple(top5[['name', 'fee_per_hour', 'distance', spots]].itertuples(index=False, name=None))
+    fee_fig, distance_fig, spots_fig = comparison_figures(rows, spots, 'Free Spots' if live else 'Total Spots')
+
     # Fee per Hour
     st.markdown("###### 💰 Fee per Hour")
-    fig = px.bar(top5, x='name', y='fee_per_hour',
-                labels={'fee_per_hour': 'Fee (€/hour)', 'name': 'Parking Location'},
-                color='fee_per_hour',
-                color_continuous_scale='Oranges')
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font={'family': 'SF Pro Display, sans-serif'},
-        xaxis_tickangle=-45
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fee_fig, use_container_width=True)
 
     # Travel Distance
     st.markdown("###### 🚗 Travel Distance")
-    fig = px.bar(top5, x='name', y='distance',
-                labels={'distance': 'Distance (km)', 'name': 'Parking Location'},
-                color='distance',
-                color_continuous_scale='Greens')
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font={'family': 'SF Pro Display, sans-serif'},
-        xaxis_tickangle=-45
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(distance_fig, use_container_width=True)
 
-    # Spots Available
-    st.markdown("###### 🅿️ Total Spot Availability")
-    fig = px.bar(top5, x='name', y='total_spots',
-                labels={'total_spots': 'Available Spots', 'name': 'Parking Location'},
-                color='total_spots',
-                color_continuous_scale='Blues')
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font={'family': 'SF Pro Display, sans-serif'},
-        xaxis_tickangle=-45
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.markdown("###### 🅿️ Free Spots Right Now" if live else "###### 🅿️ Total Spot Availability")
+    st.plotly_chart(spots_fig, use_container_width=True)
 
-def insights_tab(df):
+def insights_tab(df, index=None, occupancy=None):
     filtered_df = filter_df(df, (st.session_state.user_lat, st.session_state.user_lon), 
-                          max_dist=10.0, fee_range=(0.0, 5.0), ev_only=False)
+                          max_dist=10.0, fee_range=(0.0, 5.0), ev_only=False, index=index)
+    if occupancy is not None:
+        filtered_df = with_free_spots(filtered_df, occupancy)
         
     st.markdown("#### 🌱 Environmental Impact")
 
-    # Your CO2 data
-    co2_data = {
-        'Car (Gasoline)': 120, 'Car (Diesel)': 110, 'Electric Car': 30, 'Hybrid Car': 80,
-        'Public Transport': 25, 'Bicycle': 0, 'Walking': 0, 'E-Scooter': 15
-    }
-
-    # Define color for each transport type
-    transport_colors = {
-        'Car (Gasoline)': '#FF453A',
-        'Car (Diesel)': '#FFD60A',
-        'Electric Car': '#30D158',
-        'Hybrid Car': '#FFD60A',
-        'Public Transport': '#30D158',
-        'Bicycle': '#30D158',
-        'Walking': '#30D158',
-        'E-Scooter': '#30D158'
-    }
+    # Two rows of four gauges
+    gauges = co2_gauges()
+    for row in (gauges[:4], gauges[4:]):
+        for col, fig in zip(st.columns(4), row):
+            with col:
+                st.plotly_chart(fig, use_container_width=True)
 
-    # Create 4 columns (2 charts per row)
-    col1, col2, col3, col4 = st.columns(4)
-
-    # First row
-    with col1:
-        st.plotly_chart(
-            create_apple_gauge(
-                co2_data['Car (Gasoline)'],
-                150,
-                transport_colors['Car (Gasoline)'],
-                'Gasoline Car'
-            ),
-            use_container_width=True
-        )
-
-    with col2:
-        st.plotly_chart(
-            create_apple_gauge(
-                co2_data['Car (Diesel)'],
-                150,
-                transport_colors['Car (Diesel)'],
-                'Diesel Car'
-            ),
-            use_container_width=True
-        )
-
-    with col3:
-        st.plotly_chart(
-            create_apple_gauge(
-                co2_data['Electric Car'],
-                150,
-                transport_colors['Electric Car'],
-                'Electric Car'
-            ),
-            use_container_width=True
-        )
-
-    with col4:
-        st.plotly_chart(
-            create_apple_gauge(
-                co2_data['Hybrid Car'],
-                150,
-                transport_colors['Hybrid Car'],
-                'Hybrid Car'
-            ),
-            use_container_width=True
-        )
-
-    # Second row
-    col5, col6, col7, col8 = st.columns(4)
-
-    with col5:
-        st.plotly_chart(
-            create_apple_gauge(
-                co2_data['Public Transport'],
-                150,
-                transport_colors['Public Transport'],
-                'Public Transport'
-            ),
-            use_container_width=True
-        )
-
-    with col6:
-        st.plotly_chart(
-            create_apple_gauge(
-                co2_data['E-Scooter'],
-                150,
-                transport_colors['E-Scooter'],
-                'E-Scooter'
-            ),
-            use_container_width=True
-        )
-
-    with col7:
-        st.plotly_chart(
-            create_apple_gauge(
-                co2_data['Bicycle'],
-                150,
-                transport_colors['Bicycle'],
-                'Bicycle'
-            ),
-            use_container_width=True
-        )
-
-    with col8:
-        st.plotly_chart(
-            create_apple_gauge(
-                co2_data['Walking'],
-                150,
-                transport_colors['Walking'],
-                'Walking'
-            ),
-            use_container_width=True
-        )
-    
     # Show comparison charts
     st.markdown("#### 📊 Parking Insights")
     if not filtered_df.empty:
@@ -278,8 +168,7 @@ def insights_tab(df):
     
     with calc_col2:
         fuel_type = st.selectbox("Fuel Type", ["Super E10", "Diesel", "Super E5"])
-        fuel_df = load_fuel_prices()
-        current_fuel_price = fuel_df[fuel_type].iloc[-1]
+        current_fuel_price = get_fuel_service().latest(fuel_type, st.session_state.get("selected_city"))
         
         st.markdown(f"""
         <div class="metric-card">
@@ -294,21 +183,34 @@ def insights_tab(df):
         time_value = st.number_input("Time Value (€/hour)", min_value=5.0, value=15.0, step=1.0)
     
     if st.button("Calculate Trip Cost", key="calc_trip") and not filtered_df.empty:
-        selected_parking = filtered_df.iloc[0]
-        fuel_cost = (trip_distance * 2 * consumption / 100) * current_fuel_price
-        parking_cost = selected_parking['fee_per_hour'] * parking_duration
-        time_cost = (trip_distance * 2 / 30) * time_value
-        total_cost = fuel_cost + parking_cost + time_cost
-        co2_emission = trip_distance * 2 * 120 / 1000
+        with profiling.stage("insights.trip_cost"):
+            costs = TripCosts(filtered_df['fee_per_hour'].to_numpy(), filtered_df['distance'].to_numpy(),
+                              trip_distance, parking_duration, current_fuel_price, consumption, time_value)
+            picks = costs.cheapest(TOP_K)[0]
+        best = picks[0]
+        selected_parking = filtered_df.iloc[best]
+        fuel_cost = costs.fuel[0, best]
+        parking_cost = costs.parking[0, best]
+        time_cost = costs.time[0, best]
+        co2_cost = costs.co2[0, best]
+        total_cost = costs.total[0, best]
+        co2_emission = costs.co2_kg[0, best]
         
         st.success(f"""
-        **Trip Cost Breakdown:**  
+        **Trip Cost Breakdown ({selected_parking['name']}):**  
         ⛽ **Fuel Cost:** €{fuel_cost:.2f}  
         🅿️ **Parking Cost:** €{parking_cost:.2f}  
         ⏱️ **Time Cost:** €{time_cost:.2f}  
+        🌍 **CO₂ Cost:** €{co2_cost:.2f}  
         💰 **Total Cost:** €{total_cost:.2f}  
         
         **Environmental Impact:**  
         🌍 **CO₂ Emissions:** {co2_emission:.2f} kg  
         🌳 **Offset needed:** {co2_emission/22:.1f} trees/year
         """)
+        
+        st.markdown("###### 🏆 Cheapest Options")
+        options = filtered_df.iloc[picks][['name', 'fee_per_hour', 'distance']].assign(total=costs.total[0, picks])
+        st.dataframe(options.rename(columns={'name': 'Parking Location', 'fee_per_hour': 'Fee (€/h)',
+                                             'distance': 'Distance (km)', 'total': 'Total Cost (€)'}),
+                     hide_index=True, use_container_width=True)
@@ -0,0 +1,77 @@
+import numpy as np
+
+
+def minmax_indices(values, bucket):
+    """Row indices of the min and max of every `bucket` consecutive rows.
+
+    Both extremes are kept, in time order, so spikes survive any amount of
+    downsampling. NaN rows are never chosen unless a bucket is all NaN.
+    """
+    n = len(values)
+    if bucket <= 1 or n == 0:
+        return np.arange(n)
+    n_buckets = -(-n // bucket)
+    padded = np.full(n_buckets * bucket, np.nan)
+    padded[:n] = values
+    grid = padded.reshape(n_buckets, bucket)
+    lo = np.argmin(np.where(np.isnan(grid), np.inf, grid), axis=1)
+    hi = np.argmax(np.where(np.isnan(grid), -np.inf, grid), axis=1)
+    offsets = np.arange(n_buckets) * bucket
+    picks = np.sort(np.stack([lo, hi], axis=1), axis=1) + offsets[:, None]
+    picks = picks.ravel()
+    picks = picks[picks < n]
+    # Flat buckets pick the same row twice
+    keep = np.ones(len(picks), dtype=bool)
+    keep[1:] = picks[1:] != picks[:-1]
+    return picks[keep]
+
+
+class SeriesPyramid:
+    """Min/max-per-bucket levels of one series, built once.
+
+    Level k keeps two rows per `factor**k` raw rows. A query picks the
+    finest level that fits the point budget for the requested row range.
+    """
+
+    def __init__(self, values, factor=4):
+        values = np.asarray(values, dtype=np.float64)
+        self.values = values
+        self.factor = factor
+        self.levels = [np.arange(len(values))]
+        bucket = factor
+        while len(self.levels[-1]) > 2 * factor:
+            self.levels.append(minmax_indices(values, bucket))
+            bucket *= factor
+
+    def query(self, lo, hi, max_points):
+        """Raw row indices to plot for rows lo..hi inclusive."""
+        for k, level in enumerate(self.levels):
+            start, end = np.searchsorted(level, [lo, hi + 1])
+            if end - start <= max_points:
+                break
+        # Keep the range end points so the line spans the selected dates
+        picks = [level[start:end], [lo, hi]]
+        bucket = self.factor ** k
+        if bucket > 1:
+            # Buckets cut by the range edges may have their min or max outside
+            # the range; add the extremes of the in-range part from raw values
+            first_full = -(-lo // bucket) * bucket
+            last_full = (hi + 1) // bucket * bucket
+            for a, b in ((lo, min(first_full, hi + 1)), (max(last_full, lo), hi + 1)):
+                if b > a:
+                    picks.append(a + minmax_indices(self.values[a:b], b - a))
+        return np.unique(np.concatenate(picks)).astype(np.int64)
+
+
+class FramePyramid:
+    """One SeriesPyramid per column of a price frame."""
+
+    def __init__(self, df, factor=4):
+        self.index = df.index
+        self.frame = df
+        self.series = {col: SeriesPyramid(df[col].to_numpy(), factor) for col in df.columns}
+
+    def points(self, column, lo, hi, max_points):
+        """(x, y) to plot for one column over rows lo..hi inclusive."""
+        rows = self.series[column].query(lo, hi, max_points)
+        return self.index[rows], self.frame[column].to_numpy()[rows]
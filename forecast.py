@@ -0,0 +1,112 @@
+"""Batched linear-trend price forecasts.
+
+Every series is fitted in one vectorized least-squares pass over its
+trailing window, and forecasts for all horizons come from a single
+broadcast. The nightly job precomputes forecasts for the national series
+and every city in the fuel store:
+
+    python forecast.py --out forecasts.csv [--end-date 2024-12-31]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+WINDOW = 30
+HORIZON = 30
+
+
+def trailing_window(df, end_date=None, window=WINDOW):
+    """(columns, days) matrix of daily prices over the last `window` days up to end_date.
+
+    Sub-daily series (fuel_ingest --freq h) are averaged per day, so slopes
+    and horizons are always in days. Days without a price are NaN.
+    """
+    if end_date is not None:
+        df = df.loc[:pd.Timestamp(end_date)]
+    if df.empty:
+        return np.empty((len(df.columns), 0))
+    first_day = df.index[-1].floor('D') - pd.Timedelta(days=window - 1)
+    daily = df.loc[first_day:].resample('D').mean()
+    return daily.to_numpy(dtype=np.float64).T
+
+
+def fit_trend(Y):
+    """Least-squares slope and last observed value for each row of Y.
+
+    Y has shape (series, window); NaNs are ignored. Series with fewer than
+    two observations get a zero slope.
+    """
+    Y = np.asarray(Y, dtype=np.float64)
+    mask = ~np.isnan(Y)
+    t = np.broadcast_to(np.arange(Y.shape[1], dtype=np.float64), Y.shape)
+    n = mask.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t_mean = np.where(mask, t, 0).sum(axis=1) / n
+        y_mean = np.where(mask, Y, 0).sum(axis=1) / n
+        dt = np.where(mask, t - t_mean[:, None], 0)
+        dy = np.where(mask, Y - y_mean[:, None], 0)
+        slope = (dt * dy).sum(axis=1) / (dt * dt).sum(axis=1)
+    slope = np.where(n >= 2, slope, 0.0)
+    # Last non-NaN value per row
+    last_pos = Y.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1)
+    last = Y[np.arange(len(Y)), last_pos]
+    return slope, last
+
+
+def forecast(Y, horizon=HORIZON):
+    """(series, horizon) matrix of forecasts for days 1..horizon."""
+    slope, last = fit_trend(Y)
+    steps = np.arange(1, horizon + 1)
+    return np.maximum(last[:, None] + slope[:, None] * steps, 0)
+
+
+def forecast_frame(df, end_date=None, window=WINDOW, horizon=HORIZON):
+    """Forecasts for every column of a date-indexed frame, one row per horizon."""
+    values = forecast(trailing_window(df, end_date, window), horizon)
+    return pd.DataFrame(values.T, index=pd.RangeIndex(1, horizon + 1, name='days_ahead'),
+                        columns=df.columns)
+
+
+def forecast_all(series, end_date=None, window=WINDOW, horizon=HORIZON):
+    """Fit many {key: price frame} series in a single pass.
+
+    Returns a long frame with key, fuel, days_ahead and price columns.
+    """
+    keys, fuels, rows = [], [], []
+    for key, df in series.items():
+        Y = trailing_window(df, end_date, window)
+        if Y.shape[1] < window:
+            Y = np.hstack([np.full((len(Y), window - Y.shape[1]), np.nan), Y])
+        keys.extend([key] * len(df.columns))
+        fuels.extend(df.columns)
+        rows.append(Y)
+    if not rows:
+        return pd.DataFrame(columns=['key', 'fuel', 'days_ahead', 'price'])
+    values = forecast(np.vstack(rows), horizon)
+    return pd.DataFrame({
+        'key': np.repeat(keys, horizon),
+        'fuel': np.repeat(fuels, horizon),
+        'days_ahead': np.tile(np.arange(1, horizon + 1), len(keys)),
+        'price': values.ravel(),
+    })
+
+
+def main():
+    from data import read_fuel
+    from fuel_ingest import read_store
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default="forecasts.csv")
+    parser.add_argument("--end-date", default=None)
+    parser.add_argument("--horizon", type=int, default=HORIZON)
+    args = parser.parse_args()
+
+    series = {"national": read_fuel(), **read_store()}
+    result = forecast_all(series, args.end_date, horizon=args.horizon)
+    result.to_csv(args.out, index=False)
+    print(f"{len(series)} series x {args.horizon} days -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Streaming ingest of station-level fuel prices into per-city series.
+
+Reads Tankerkönig-style dumps (prices: date, station_uuid, diesel, e5,
+e10; stations: uuid, city, ...) in chunks and keeps only running sums and
+counts per (city, period), so peak memory depends on the number of
+cities and periods, not on the input size:
+
+    python fuel_ingest.py --stations stations.csv prices/2024-*.csv [--freq h]
+
+The result is written as the "fuel_city" snapshot and read back through
+data.read_city_fuel.
+"""
+import argparse
+
+import pandas as pd
+
+from snapshot import write_snapshot, read_snapshot, SNAPSHOT_DIR
+
+STORE_NAME = "fuel_city"
+FUEL_COLUMNS = {'e10': 'Super E10', 'diesel': 'Diesel', 'e5': 'Super E5'}
+CHUNKSIZE = 500_000
+
+
+def load_station_cities(path):
+    """station uuid -> city name."""
+    stations = pd.read_csv(path, usecols=['uuid', 'city'], dtype=str)
+    stations['city'] = stations['city'].str.strip()
+    return stations.dropna().set_index('uuid')['city']
+
+
+def aggregate_chunk(chunk, station_city, freq):
+    city = chunk['station_uuid'].map(station_city)
+    keep = city.notna()
+    chunk, city = chunk[keep], city[keep]
+    period = (pd.to_datetime(chunk['date'], utc=True, format="ISO8601")
+              .dt.tz_convert("Europe/Berlin").dt.tz_localize(None).dt.floor(freq))
+    prices = chunk[list(FUEL_COLUMNS)]
+    # Tankerkönig reports 0 or negative prices for fuels a station doesn't sell
+    prices = prices.where(prices > 0)
+    keys = [city.rename('city'), period.rename('date')]
+    grouped = prices.groupby(keys)
+    return grouped.sum(), grouped.count()
+
+
+def aggregate_prices(price_files, station_city, freq="D", chunksize=CHUNKSIZE):
+    """Mean price per (city, period) across all files, read chunk by chunk."""
+    sums = counts = None
+    for path in price_files:
+        reader = pd.read_csv(path, usecols=['date', 'station_uuid', *FUEL_COLUMNS],
+                             dtype={name: 'float32' for name in FUEL_COLUMNS}, chunksize=chunksize)
+        for chunk in reader:
+            chunk_sums, chunk_counts = aggregate_chunk(chunk, station_city, freq)
+            if sums is None:
+                sums, counts = chunk_sums, chunk_counts
+            else:
+                sums = sums.add(chunk_sums, fill_value=0)
+                counts = counts.add(chunk_counts, fill_value=0)
+    if sums is None:
+        return pd.DataFrame(columns=list(FUEL_COLUMNS.values()))
+    means = (sums / counts.where(counts > 0)).rename(columns=FUEL_COLUMNS)
+    return means.astype('float32').sort_index()
+
+
+def write_store(means, source, directory=SNAPSHOT_DIR):
+    frame = means.reset_index()
+    frame['city'] = frame['city'].astype('category')
+    return write_snapshot(frame, STORE_NAME, source, directory)
+
+
+def read_store(directory=SNAPSHOT_DIR):
+    """{city: date-indexed price frame}; empty when no store was built."""
+    try:
+        frame = read_snapshot(STORE_NAME, directory)
+    except (OSError, ValueError, KeyError):
+        return {}
+    return {
+        # Carry prices forward over periods where no station reported
+        city: group.drop(columns='city').set_index('date').ffill()
+        for city, group in frame.groupby('city', observed=True)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("prices", nargs="+", help="price CSV files, oldest first")
+    parser.add_argument("--stations", required=True, help="stations CSV with uuid and city")
+    parser.add_argument("--freq", default="D", help="aggregation period, e.g. D or h")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    args = parser.parse_args()
+
+    means = aggregate_prices(args.prices, load_station_cities(args.stations), args.freq, args.chunksize)
+    path = write_store(means, args.prices[-1])
+    cities = means.index.get_level_values('city').nunique()
+    print(f"{len(means):,} {args.freq} rows for {cities} cities -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import threading
+
+from data import FUEL_CSV, read_fuel, read_fuel_latest, load_city_fuel
+from fuel_stats import FuelStats
+from downsample import FramePyramid
+from forecast import forecast_frame
+from refresh import get_refresh_worker
+
+MAX_FORECASTS = 128
+
+
+class FuelSeries:
+    """One price frame plus the structures built over it."""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.stats = FuelStats(frame)
+        self.pyramid = FramePyramid(frame)
+
+
+class FuelService:
+    """Process-wide access to national and per-city fuel prices.
+
+    Series are loaded on first use and shared by every session. `latest`
+    answers from an already loaded series when there is one and otherwise
+    reads only the tail of the national CSV.
+    """
+
+    def __init__(self, path=FUEL_CSV, cities=None):
+        self.path = path
+        # {casefolded city: price frame}; defaults to the process-wide store
+        self.cities = cities if cities is not None else load_city_fuel()
+        self._lock = threading.Lock()
+        self._series = {}
+        self._forecasts = {}
+
+    def city_frame(self, city):
+        return self.cities.get(city.strip().casefold()) if city else None
+
+    def resolve(self, city):
+        """The city if it has its own series, else None for the national average."""
+        return city if self.city_frame(city) is not None else None
+
+    def series(self, city=None):
+        key = self.resolve(city)
+        with self._lock:
+            if key not in self._series:
+                frame = self.city_frame(key) if key else read_fuel(self.path)
+                self._series[key] = FuelSeries(frame)
+            return self._series[key]
+
+    def frame(self, city=None):
+        return self.series(city).frame
+
+    def latest(self, fuel, city=None):
+        key = self.resolve(city)
+        if key is not None:
+            return float(self.city_frame(key)[fuel].iloc[-1])
+        loaded = self._series.get(None)
+        if loaded is not None:
+            return float(loaded.frame[fuel].iloc[-1])
+        return float(read_fuel_latest(self.path)[fuel])
+
+    def range(self, start_date, end_date, city=None):
+        """(rows for the dates, lo, hi) with lo..hi the inclusive row positions."""
+        series = self.series(city)
+        lo, hi = series.stats.positions(start_date, end_date)
+        return series.frame.iloc[lo:hi + 1], lo, hi
+
+    def forecast(self, city=None, end_date=None):
+        """All fuels and horizons for the series ending at end_date."""
+        key = (self.resolve(city), end_date)
+        with self._lock:
+            cached = self._forecasts.get(key)
+        if cached is None:
+            cached = forecast_frame(self.frame(city), end_date)
+            with self._lock:
+                if len(self._forecasts) >= MAX_FORECASTS:
+                    self._forecasts.clear()
+                self._forecasts[key] = cached
+        return cached
+
+
+def get_fuel_service():
+    # Latest snapshot published by the refresh worker
+    return get_refresh_worker().get("fuel")
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+
+class SparseTable:
+    """O(1) range-max/min queries over the rows of a (n, k) array.
+
+    Level j holds the extremum of every window of 2**j rows, so any range is
+    covered by two overlapping windows. Built once in O(n log n).
+    """
+
+    def __init__(self, values, op=np.maximum):
+        self.op = op
+        self.levels = [np.asarray(values, dtype=np.float64)]
+        width = 1
+        while 2 * width <= len(values):
+            prev = self.levels[-1]
+            self.levels.append(op(prev[:-width], prev[width:]))
+            width *= 2
+
+    def query(self, lo, hi):
+        """Extremum of rows lo..hi inclusive, one value per column."""
+        level = int(hi - lo + 1).bit_length() - 1
+        table = self.levels[level]
+        return self.op(table[lo], table[hi - (1 << level) + 1])
+
+
+class FuelStats:
+    """Precomputed statistics over a date-indexed fuel price frame.
+
+    Date ranges resolve to row positions by binary search, and every
+    statistic below is then a constant-time lookup. The change window is
+    measured in days, not rows, so daily and hourly series (fuel_ingest
+    --freq h) both report a 30-day change.
+    """
+
+    def __init__(self, df, window=30):
+        self.columns = list(df.columns)
+        self.dates = df.index.to_numpy()
+        self.values = df.to_numpy(dtype=np.float64)
+        self.window = window
+        self.max_table = SparseTable(self.values, np.maximum)
+        self.min_table = SparseTable(self.values, np.minimum)
+        # First row of the trailing window ending on each row; the window
+        # spans `window` calendar days, like `window` rows of a daily series
+        window_dates = self.dates - np.timedelta64(window - 1, 'D')
+        self.window_start = np.searchsorted(self.dates, window_dates, side="left")
+        # Change over that window (NaN where the series starts too late)
+        covered = window_dates >= self.dates[0] if len(self.dates) else np.zeros(0, dtype=bool)
+        self.window_change = np.where(covered[:, None], self.values - self.values[self.window_start], np.nan)
+
+    def __len__(self):
+        return len(self.values)
+
+    def _col(self, fuel):
+        return self.columns.index(fuel)
+
+    def positions(self, start_date, end_date):
+        """Inclusive row range (lo, hi) for the dates; hi < lo when empty."""
+        lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start_date)), side="left")
+        hi = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end_date)), side="right") - 1
+        return int(lo), int(hi)
+
+    def days(self, lo, hi):
+        """Calendar days the rows lo..hi touch."""
+        first, last = self.dates[[lo, hi]].astype('datetime64[D]')
+        return int((last - first) // np.timedelta64(1, 'D')) + 1
+
+    def current(self, hi, fuel):
+        return self.values[hi, self._col(fuel)]
+
+    def high(self, lo, hi, fuel):
+        return self.max_table.query(lo, hi)[self._col(fuel)]
+
+    def low(self, lo, hi, fuel):
+        return self.min_table.query(lo, hi)[self._col(fuel)]
+
+    def change(self, lo, hi, fuel):
+        """(absolute change, percent change, period label) for the range.
+
+        Uses the trailing window when the range spans at least that many
+        days, otherwise the whole range.
+        """
+        col = self._col(fuel)
+        days = self.days(lo, hi)
+        if days >= self.window and not np.isnan(self.window_change[hi, col]):
+            change = self.window_change[hi, col]
+            base = self.values[self.window_start[hi], col]
+            label = f"{self.window}-Day Change"
+        else:
+            change = self.values[hi, col] - self.values[lo, col]
+            base = self.values[lo, col]
+            label = f"{days}-Day Change"
+        return change, change / base * 100, label
@@ -0,0 +1,27 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km.
+
+    Works on scalars and on any NumPy-broadcastable arrays, so one call can
+    cover a whole column of garages. Missing coordinates yield NaN, which
+    drops out of every `distance <= max_dist` comparison.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def distances_from(lat, lon, df):
+    """Distance in km from one origin to every row of a frame with lat/lon columns."""
+    return haversine(lat, lon, df['lat'].to_numpy(), df['lon'].to_numpy())
+
+
+def distance_matrix(origin_lats, origin_lons, lats, lons):
+    """N origins x M garages distance matrix in a single pass."""
+    origin_lats = np.asarray(origin_lats, dtype=np.float64)[:, None]
+    origin_lons = np.asarray(origin_lons, dtype=np.float64)[:, None]
+    return haversine(origin_lats, origin_lons, np.asarray(lats)[None, :], np.asarray(lons)[None, :])
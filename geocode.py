@@ -0,0 +1,131 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+import pandas as pd
+from geopy.geocoders import Nominatim
+from geopy.extra.rate_limiter import RateLimiter
+from geopy.exc import GeopyError
+
+from circuit import CircuitBreaker
+from postal_codes import PLZ_CSV
+
+# e.g. http://127.0.0.1:5001 for benchmarks/stub_server.py; the public service when unset
+NOMINATIM_URL = os.environ.get("SMARTPARK_NOMINATIM_URL", "")
+GEOCODE_DB = os.environ.get("SMARTPARK_GEOCODE_DB", os.path.join(".cache", "geocode.sqlite"))
+PLZ_PATTERN = re.compile(r"^\d{5}$")
+# Misses are retried after a day; hits are kept for a month
+NEGATIVE_TTL = 24 * 3600
+POSITIVE_TTL = 30 * 24 * 3600
+
+GeocodeResult = namedtuple("GeocodeResult", ["lat", "lon", "source"])
+
+
+def normalize_query(query):
+    return " ".join(query.strip().lower().split())
+
+
+class GeocodeCache:
+    """On-disk query -> coordinates cache shared by every session and process."""
+
+    def __init__(self, path=GEOCODE_DB):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            "query TEXT PRIMARY KEY, lat REAL, lon REAL, updated REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, query):
+        """(lat, lon), None for a cached miss, or KeyError if unknown or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lat, lon, updated FROM geocode WHERE query = ?", (query,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(query)
+        lat, lon, updated = row
+        ttl = NEGATIVE_TTL if lat is None else POSITIVE_TTL
+        if time.time() - updated > ttl:
+            raise KeyError(query)
+        return None if lat is None else (lat, lon)
+
+    def put(self, query, coords):
+        lat, lon = coords if coords else (None, None)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode (query, lat, lon, updated) VALUES (?, ?, ?, ?)",
+                (query, lat, lon, time.time()),
+            )
+
+
+def load_plz_centroids(path=PLZ_CSV, parking_df=None):
+    """Postal code -> (lat, lon).
+
+    Reads the nationwide centroid table built by postal_codes.py. Postal
+    codes it lacks, or all of them when it has not been built, fall back to
+    the mean garage position per postal code in the parking data.
+    """
+    centroids = {}
+    if parking_df is not None and len(parking_df):
+        grouped = parking_df.groupby(parking_df['postal_code'].astype(str).str.zfill(5))[['lat', 'lon']].mean()
+        centroids.update((plz, (float(r.lat), float(r.lon))) for plz, r in grouped.iterrows())
+    if os.path.exists(path):
+        table = pd.read_csv(path, dtype={'plz': str})
+        centroids.update(zip(table['plz'].str.zfill(5), zip(table['lat'], table['lon'])))
+    return centroids
+
+
+class Geocoder:
+    """Resolves addresses via PLZ table, then disk cache, then Nominatim.
+
+    Only true misses reach Nominatim, through one client and one rate
+    limiter shared by every caller of this instance.
+    """
+
+    def __init__(self, cache, plz_centroids=None, user_agent="parking_finder", min_delay_seconds=1,
+                 base_url=NOMINATIM_URL):
+        self.cache = cache
+        self.plz_centroids = plz_centroids or {}
+        self.user_agent = user_agent
+        self.base_url = base_url
+        self.min_delay_seconds = min_delay_seconds
+        self.remote_calls = 0
+        self.breaker = CircuitBreaker("Nominatim")
+        self._geocode = None
+        self._lock = threading.Lock()
+
+    def _remote(self, query):
+        with self._lock:
+            if self._geocode is None:
+                if self.base_url:
+                    url = urlsplit(self.base_url)
+                    client = Nominatim(user_agent=self.user_agent, domain=url.netloc, scheme=url.scheme)
+                else:
+                    client = Nominatim(user_agent=self.user_agent)
+                # Let network errors propagate instead of being cached as misses
+                self._geocode = RateLimiter(client.geocode, min_delay_seconds=self.min_delay_seconds,
+                                            swallow_exceptions=False)
+            self.remote_calls += 1
+            return self.breaker.call(self._geocode, query, errors=(GeopyError,))
+
+    def geocode(self, query):
+        key = normalize_query(query)
+        if PLZ_PATTERN.match(key) and key in self.plz_centroids:
+            return GeocodeResult(*self.plz_centroids[key], "postal code table")
+        try:
+            coords = self.cache.get(key)
+            return GeocodeResult(*coords, "cache") if coords else None
+        except KeyError:
+            pass
+        location = self._remote(query)
+        coords = (location.latitude, location.longitude) if location else None
+        self.cache.put(key, coords)
+        return GeocodeResult(*coords, "Nominatim") if coords else None
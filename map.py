@@ -1,17 +1,26 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import folium
+from folium.plugins import FastMarkerCluster
 from streamlit_folium import st_folium
-import requests
-from math import radians, sin, cos, sqrt, atan2
 import plotly.express as px
 import random
+import functools
+import datetime
+from math import radians, cos
+import requests
+from routing import Router, RoutingError
+from geo import distances_from
+from refresh import current_parking, get_refresh_worker
+from pipeline import StagePipeline
+from result_cache import ResultCache
+import profiling
+from availability import AvailabilityIndex, SLOT_MINUTES, hours_label
+from occupancy import UNKNOWN, with_free_spots, refresh_tick
 
-@st.cache_data
 def load_full_parking_data():
-    df = pd.read_csv("parking_data.csv", encoding="utf-8")
-    df = df.rename(columns={'latitude': 'lat', 'longitude': 'lon'})
-    return df
+    return current_parking().view()
 
 def load_parking_data():
     return st.session_state.get("filtered_df", load_full_parking_data())
@@ -28,101 +37,363 @@ def get_fun_fact():
     ]
     return random.choice(facts)
 
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth radius in km
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat/2)**2 + cos(lat1)*cos(lat2)*sin(dlon/2)**2
-    return R * 2 * atan2(sqrt(a), sqrt(1-a))
+@st.cache_resource
+def get_router():
+    # One router per process so every session shares the route cache
+    router = Router()
+    profiling.register_counter("osrm.requests", lambda: router.requests_made)
+    profiling.register_counter("route_cache.hits", lambda: router.cache.hits)
+    profiling.register_counter("route_cache.misses", lambda: router.cache.misses)
+    return router
 
 def get_route(start_lon, start_lat, end_lon, end_lat):
+    profiling.count("get_route.calls")
     try:
-        url = f"http://router.project-osrm.org/route/v1/driving/{start_lon},{start_lat};{end_lon},{end_lat}?overview=full&geometries=geojson"
-        res = requests.get(url).json()
-        if res['code'] == 'Ok':
-            r = res['routes'][0]
-            coords = [(lat, lon) for lon, lat in r['geometry']['coordinates']]
-            return coords, r['distance']/1000, r['duration']/60
-    except Exception as e:
+        return get_router().route((start_lat, start_lon), (end_lat, end_lon))
+    except (requests.RequestException, RoutingError, KeyError, ValueError) as e:
         st.error(f"Routing error: {e}")
     return None, None, None
 
-def filter_data(df, lat, lon, max_dist, fee_range, ev_only, open_weekend, cashless_payment):
-    # Make a copy of the DataFrame
-    df = df.copy()
-    
-    # Clean boolean columns
-    for col in ['open_weekend', 'open_holidays', 'ev_charging', 'cashless_payment']:
-        if col in df.columns:
-            df[col] = df[col].fillna(False).astype(bool)
-    
-    # Calculate distances
-    df['distance'] = df.apply(
-        lambda r: haversine(lat, lon, r['lat'], r['lon']), 
-        axis=1
-    )
-    
-    # Apply filters
-    df = df[df['distance'] <= max_dist]
-    df = df[df['fee_per_hour'].between(*fee_range)]
+def get_route_summaries(lat, lon, df):
+    # Distance/duration for every row in one batched, cached lookup
+    try:
+        return get_router().summaries((lat, lon), list(zip(df['lat'], df['lon'])))
+    except (requests.RequestException, RoutingError, KeyError, ValueError) as e:
+        st.error(f"Routing error: {e}")
+    return None
+
+# Largest radius the filter form allows; the distance stage covers it once
+MAX_DIST_KM = 20.0
+PAGE_SIZE = 10
+
+def distance_stage(df, lat, lon, index, radius=MAX_DIST_KM):
+    # Narrow to the radius first when a spatial index over df is available
+    if index is not None and len(index) == len(df):
+        positions, distances = index.within(lat, lon, radius)
+        df = df.iloc[positions].assign(distance=distances)
+    else:
+        df = df.assign(distance=distances_from(lat, lon, df))
+    return df[df['distance'] <= radius]
+
+def radius_stage(df, max_dist):
+    return df[df['distance'] <= max_dist]
+
+def fee_stage(df, fee_range):
+    return df[df['fee_per_hour'].between(*fee_range)]
+
+def flags_stage(df, ev_only, open_weekend, cashless_payment):
     if ev_only: 
-        df = df[df['ev_charging']]
+        df = df[df['has_ev']]
     if open_weekend: 
         df = df[df['open_weekend']]
     if cashless_payment: 
         df = df[df['cashless_payment']]
-    
     return df
 
-def create_map(lat, lon, df):
-    m = folium.Map(location=[lat, lon], zoom_start=14)
-    folium.Marker([lat, lon], popup="Your Location", icon=folium.Icon(color="blue")).add_to(m)
+def availability_stage(df, availability, stay):
+    # stay is (arrival datetime, hours) or None; the index is keyed by garage_id
+    if stay is None:
+        return df
+    if availability is None:
+        return df[AvailabilityIndex.from_frame(df).open_during(*stay)]
+    return df[availability.open_during(*stay)[df['garage_id'].to_numpy()]]
+
+def occupancy_stage(df, occupancy, _tick, free_only):
+    # _tick only invalidates the memoized stage when new readings may exist
+    if occupancy is None:
+        return df.assign(free_spots=UNKNOWN)
+    df = with_free_spots(df, occupancy)
+    if free_only:
+        # Unknown counts as possibly free
+        df = df[df['free_spots'] != 0]
+    return df
+
+def sort_stage(df, sort_method):
+    # Keep row labels so list entries can select map markers
+    if sort_method == "Closest Distance":
+        return df.sort_values('distance')
+    if sort_method == "Lowest Fee":
+        return df.sort_values('fee_per_hour')
+    return df
+
+def page_stage(df, page):
+    start_idx = (page - 1) * PAGE_SIZE
+    return df.iloc[start_idx:start_idx + PAGE_SIZE]
+
+def filter_data(df, lat, lon, max_dist, fee_range, ev_only, open_weekend, cashless_payment, index=None,
+                stay=None, availability=None, occupancy=None, free_only=False):
+    df = distance_stage(df, lat, lon, index, radius=max_dist)
+    df = fee_stage(df, fee_range)
+    df = flags_stage(df, ev_only, open_weekend, cashless_payment)
+    df = availability_stage(df, availability, stay)
+    return occupancy_stage(df, occupancy, None, free_only)
+
+@st.cache_resource
+def get_result_cache():
+    # Filtered, sorted results shared by every session in this process
+    cache = ResultCache()
+    profiling.register_counter("result_cache.hits", lambda: cache.hits)
+    profiling.register_counter("result_cache.misses", lambda: cache.misses)
+    return cache
+
+def encode_result(df):
+    return df.index.to_numpy(), df['distance'].to_numpy()
+
+def decode_result(source, cached):
+    labels, distances = cached
+    return source.loc[labels].assign(distance=distances)
+
+def parking_pipeline():
+    # Per-session memoized chain over a process-wide result cache; see pipeline.StagePipeline
+    if "parking_pipeline" not in st.session_state:
+        st.session_state.parking_pipeline = StagePipeline([
+            ("distance", lambda df, lat, lon, index, _rows: distance_stage(df, lat, lon, index)),
+            ("radius", radius_stage),
+            ("fee", fee_stage),
+            ("flags", flags_stage),
+            ("availability", availability_stage),
+            ("sort", sort_stage),
+            ("occupancy", occupancy_stage),
+            ("page", page_stage),
+        ], shared=get_result_cache(), encode=encode_result, decode=decode_result)
+    return st.session_state.parking_pipeline
 
-    for _, row in df.iterrows():
-        route, dist, dur = get_route(lon, lat, row['lon'], row['lat'])
-        popup = f"""
+def result_keys(data_key, lat, lon, max_dist, fee_range, flags, stay, sort_method):
+    # Plain-valued keys; origins within the same ~1 m cell share a result
+    if data_key is None:
+        return None
+    return {
+        "distance": (data_key, round(float(lat), 5), round(float(lon), 5)),
+        "radius": max_dist,
+        "fee": tuple(fee_range),
+        "flags": tuple(flags),
+        "availability": stay,
+        "sort": sort_method,
+    }
+
+def find_garage(df, lat, lon, tolerance=1e-5):
+    # Map a clicked marker position back to its row label
+    if df.empty:
+        return None
+    offset = (df['lat'] - lat).abs() + (df['lon'] - lon).abs()
+    label = offset.idxmin()
+    return label if offset[label] <= tolerance else None
+
+MAP_WIDTH, MAP_HEIGHT = 700, 500
+DEFAULT_ZOOM = 14
+# Below this zoom, views with more than LOD_MIN_MARKERS garages are aggregated
+LOD_ZOOM = 12
+LOD_MIN_MARKERS = 50
+
+# Above this many results markers are drawn client-side by FastMarkerCluster
+CLUSTER_THRESHOLD = 200
+
+# Builds one circle marker with its popup per [lat, lon, popup, radius] row
+CLUSTER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: row[3], color: '#FF5722', fillColor: '#FF9800', fill: true, fillOpacity: 0.7
+    });
+    marker.bindPopup(row[2], {maxWidth: 300});
+    return marker;
+};
+"""
+
+@functools.lru_cache(maxsize=8192)
+def popup_html(name, address, fee, distance, spots, ev, origin_lat, origin_lon, lat, lon, dist=None, dur=None, free=UNKNOWN):
+    # Shared by every session; garages near a popular origin are rendered once
+    return f"""
         <div style="width:250px">
-            <h4>{row['name']}</h4>
-            <b>Address:</b> {row['address']}<br>
-            <b>Price:</b> €{row['fee_per_hour']:.1f}/h<br>
-            <b>Distance:</b> {row['distance']:.1f} km<br>
-            <b>Spots:</b> {row['total_spots']}<br>
-            <b>EV Charging:</b> {'Yes' if row['ev_charging'] else 'No'}<br>
+            <h4>{name}</h4>
+            <b>Address:</b> {address}<br>
+            <b>Price:</b> €{fee:.1f}/h<br>
+            <b>Distance:</b> {distance:.1f} km<br>
+            <b>Spots:</b> {f"{free} free of {spots}" if free >= 0 else spots}<br>
+            <b>EV Charging:</b> {'Yes' if ev else 'No'}<br>
             {f"<b>Route Distance:</b> {dist:.1f} km<br>" if dist else ""}
             {f"<b>Estimated Time:</b> {dur:.0f} min<br>" if dur else ""}
-            <a href="https://www.google.com/maps/dir/?api=1&origin={lat},{lon}&destination={row['lat']},{row['lon']}&travelmode=driving" target="_blank">🚗 Navigate</a>
+            <a href="https://www.google.com/maps/dir/?api=1&origin={origin_lat},{origin_lon}&destination={lat},{lon}&travelmode=driving" target="_blank">🚗 Navigate</a>
         </div>
         """
+
+profiling.register_counter("popup_cache.hits", lambda: popup_html.cache_info().hits)
+
+def build_markers(df, lat, lon, summaries, selected, selected_route):
+    """Marker specs for one result set as (lat, lon, popup, radius, is_selected).
+
+    summaries holds (distance, duration) per row or None when routes were
+    not requested; selected_route is get_route's result for the selected row.
+    Returns (markers, route).
+    """
+    if summaries is None:
+        summaries = [None] * len(df)
+    markers = []
+    for (label, row), summary in zip(df.iterrows(), summaries):
+        dist, dur = summary if summary else (None, None)
+        if label == selected and selected_route[0]:
+            _, dist, dur = selected_route
+        popup = popup_html(row['name'], row['address'], row['fee_per_hour'], row['distance'],
+                           row['total_spots'], row['ev_charging'], lat, lon, row['lat'], row['lon'],
+                           dist, dur, int(row['free_spots']))
+        markers.append((float(row['lat']), float(row['lon']), popup, 6 + float(row['fee_per_hour']), label == selected))
+    route = selected_route[0] if selected_route else None
+    return tuple(markers), route
+
+@st.cache_resource(max_entries=256, ttl=600)
+def marker_layer(data_key, garage_keys, lat, lon, eager_routes, selected, occupancy_tick, _df, _summaries,
+                 _selected_route):
+    """build_markers for one result set, shared across reruns.
+
+    Keyed on the data version and the filtered garage keys and origin, so
+    paging, sorting or opening a list entry reuses the popups already
+    rendered, and a data refresh with new fees or hours renders them again.
+    occupancy_tick changes when live free-spot counts should be re-read.
+    Routing happens in the caller, which only comes here when it succeeded,
+    so a failed lookup is retried on the next rerun instead of being kept.
+    """
+    profiling.count("marker_layer.builds")
+    return build_markers(_df, lat, lon, _summaries, selected, _selected_route)
+
+def base_map(lat, lon):
+    m = folium.Map(location=[lat, lon], zoom_start=DEFAULT_ZOOM)
+    folium.Marker([lat, lon], popup="Your Location", icon=folium.Icon(color="blue")).add_to(m)
+    return m
+
+def garage_layer(lat, lon, df, eager_routes=False, selected=None, cluster=True, occupancy_tick=0, data_key=None):
+    # Only the selected garage is routed unless eager_routes asks for all of them;
+    # without a data_key to tell data versions apart the markers are not cached
+    layer = folium.FeatureGroup(name="Parking")
+    if 'free_spots' not in df:
+        df = df.assign(free_spots=UNKNOWN)
+    # Routes come from the router's own cache, so looking them up each rerun is cheap
+    summaries = get_route_summaries(lat, lon, df) if eager_routes else None
+    selected_route = None
+    if selected is not None and selected in df.index:
+        row = df.loc[selected]
+        selected_route = get_route(lon, lat, row['lon'], row['lat'])
+    failed = (eager_routes and summaries is None) or (selected_route is not None and selected_route[0] is None)
+    if failed or data_key is None:
+        markers, route = build_markers(df, lat, lon, summaries, selected, selected_route)
+    else:
+        markers, route = marker_layer(data_key, tuple(df['garage_key']), lat, lon, eager_routes, selected,
+                                      occupancy_tick, df, summaries, selected_route)
+    if cluster and len(markers) > CLUSTER_THRESHOLD:
+        # One client-side layer instead of thousands of serialized markers
+        FastMarkerCluster([[m_lat, m_lon, popup, radius] for m_lat, m_lon, popup, radius, is_selected in markers
+                           if not is_selected], callback=CLUSTER_CALLBACK).add_to(layer)
+        markers = [marker for marker in markers if marker[4]]
+
+    for m_lat, m_lon, popup, radius, is_selected in markers:
         folium.CircleMarker(
-            [row['lat'], row['lon']],
-            radius=6 + row['fee_per_hour'],
+            [m_lat, m_lon],
+            radius=radius,
             popup=folium.Popup(popup, max_width=300),
-            color='#FF5722',
-            fill_color='#FF9800',
+            color='#1E88E5' if is_selected else '#FF5722',
+            fill_color='#64B5F6' if is_selected else '#FF9800',
             fill=True,
             fill_opacity=0.7
-        ).add_to(m)
+        ).add_to(layer)
+
+    if route:
+        folium.PolyLine(route, color='#1E88E5', weight=5, opacity=0.8).add_to(layer)
+    return layer
+
+def create_map(lat, lon, df, eager_routes=False, selected=None, cluster=True):
+    m = base_map(lat, lon)
+    garage_layer(lat, lon, df, eager_routes=eager_routes, selected=selected, cluster=cluster).add_to(m)
     return m
 
+def estimate_bounds(lat, lon, zoom, width=MAP_WIDTH, height=MAP_HEIGHT):
+    # Web Mercator: one 256 px tile spans 360 degrees of longitude at zoom 0
+    deg_per_px = 360 / (256 * 2 ** zoom)
+    half_lon = width / 2 * deg_per_px
+    half_lat = height / 2 * deg_per_px * cos(radians(lat))
+    return lat - half_lat, lon - half_lon, lat + half_lat, lon + half_lon
+
+def current_view(lat, lon):
+    """(south, west, north, east) bounds and zoom of the map as the user left it."""
+    state = st.session_state.get("parking_map") or {}
+    bounds = state.get("bounds") or {}
+    zoom = state.get("zoom") or DEFAULT_ZOOM
+    sw, ne = bounds.get("_southWest") or {}, bounds.get("_northEast") or {}
+    view = (sw.get("lat"), sw.get("lng"), ne.get("lat"), ne.get("lng"))
+    # Before the browser reports a real viewport, or after the origin moved,
+    # fall back to what the initial map view will show
+    if st.session_state.get("map_origin") != (lat, lon) or None in view or view[0] == view[2]:
+        return estimate_bounds(lat, lon, DEFAULT_ZOOM), DEFAULT_ZOOM
+    return view, zoom
+
+def in_viewport(df, bounds, margin=0.25):
+    # Pad the viewport so small pans don't reveal an empty edge
+    south, west, north, east = bounds
+    pad_lat, pad_lon = (north - south) * margin, (east - west) * margin
+    return (df['lat'].between(south - pad_lat, north + pad_lat)
+            & df['lon'].between(west - pad_lon, east + pad_lon))
+
+def aggregate_markers(df, zoom, cell_px=64):
+    # Bucket garages into screen-sized grid cells for zoomed-out views
+    cell = 360 / (256 * 2 ** zoom) * cell_px
+    keys = [np.floor(df['lat'].to_numpy() / cell), np.floor(df['lon'].to_numpy() / cell)]
+    grouped = df.groupby(keys)
+    return pd.DataFrame({
+        'lat': grouped['lat'].mean(),
+        'lon': grouped['lon'].mean(),
+        'count': grouped.size(),
+        'min_fee': grouped['fee_per_hour'].min(),
+    }).reset_index(drop=True)
+
+def aggregate_layer(cells):
+    layer = folium.FeatureGroup(name="Parking")
+    for cell in cells.itertuples():
+        folium.CircleMarker(
+            [cell.lat, cell.lon],
+            radius=8 + 4 * np.log2(cell.count),
+            popup=folium.Popup(f"<b>{cell.count} garages</b><br>from €{cell.min_fee:.1f}/h", max_width=200),
+            tooltip=f"{cell.count} garages",
+            color='#FF5722',
+            fill_color='#FF9800',
+            fill=True,
+            fill_opacity=0.5
+        ).add_to(layer)
+    return layer
+
 max_dist_default = st.session_state.get("max_dist", 10.0)
 fee_range_default = st.session_state.get("fee_range", (0.0, 5.0))
 ev_only_default = st.session_state.get("ev_only", False)
 open_weekend_default = st.session_state.get("open_weekend", False)
 cashless_payment_default = st.session_state.get("cashless_payment", False)
+free_only_default = st.session_state.get("free_only", False)
+open_during_default = st.session_state.get("open_during", False)
+stay_hours_default = st.session_state.get("stay_hours", 2.0)
 sort_method_default = st.session_state.get("sort_method", "Closest Distance")
+eager_routes_default = st.session_state.get("eager_routes", False)
+cluster_markers_default = st.session_state.get("cluster_markers", True)
 
 
-def parking_finder_tab(df):
+def default_arrival():
+    # Now, rounded up to the next quarter hour
+    now = datetime.datetime.now().replace(second=0, microsecond=0)
+    return now + datetime.timedelta(minutes=-now.minute % SLOT_MINUTES)
+
+
+def parking_finder_tab(df, index=None, availability=None, occupancy=None, data_key=None, partitions=None):
     # Use df directly instead of loading it inside the function
     st.sidebar.header("⚙️ Filters")
+    stay_start_default = st.session_state.get("stay_start") or default_arrival()
     with st.sidebar.form("filter_form"):
-        max_dist = st.slider("Max distance (km)", 0.1, 20.0, max_dist_default, 0.1)
+        max_dist = st.slider("Max distance (km)", 0.1, MAX_DIST_KM, max_dist_default, 0.1)
         fee_range = st.slider("Fee range (€/h)", 0.0, 20.0, fee_range_default, 0.1)
         ev_only = st.checkbox("EV charging spots", value=ev_only_default)
         open_weekend = st.checkbox("Open on weekends", value=open_weekend_default)
         cashless_payment = st.checkbox("Cashless payment", value=cashless_payment_default)
+        free_only = st.checkbox("Free spots right now", value=free_only_default)
+        open_during = st.checkbox("Open during my stay", value=open_during_default)
+        stay_date = st.date_input("Arrival date", value=stay_start_default.date())
+        stay_time = st.time_input("Arrival time", value=stay_start_default.time(), step=SLOT_MINUTES * 60)
+        stay_hours = st.number_input("Stay (hours)", 0.25, 168.0, stay_hours_default, 0.25)
         sort_method = st.radio("Sort parking spots by:", ["Closest Distance", "Lowest Fee"], index=0 if sort_method_default == "Closest Distance" else 1)
+        eager_routes = st.checkbox("Show driving times for all spots", value=eager_routes_default)
+        cluster_markers = st.checkbox(f"Cluster markers above {CLUSTER_THRESHOLD} results", value=cluster_markers_default)
         filter_submitted = st.form_submit_button("Apply Filters")
 
         if filter_submitted:
@@ -131,6 +402,12 @@ def parking_finder_tab(df):
             st.session_state.ev_only = ev_only
             st.session_state.open_weekend = open_weekend
             st.session_state.cashless_payment = cashless_payment
+            st.session_state.free_only = free_only
+            st.session_state.open_during = open_during
+            st.session_state.stay_start = datetime.datetime.combine(stay_date, stay_time)
+            st.session_state.stay_hours = stay_hours
+            st.session_state.eager_routes = eager_routes
+            st.session_state.cluster_markers = cluster_markers
             st.session_state.page = 1
             st.rerun()
 
@@ -154,20 +431,59 @@ def parking_finder_tab(df):
         unsafe_allow_html=True
     )   
     
-    filtered = filter_data(
-        df,
-        st.session_state.user_lat,
-        st.session_state.user_lon,
-        max_dist,
-        fee_range,
-        ev_only,
-        open_weekend,
-        cashless_payment
-    )
-
-    # Display map
-    map_obj = create_map(st.session_state.user_lat, st.session_state.user_lon, filtered)
-    st_folium(map_obj, width=700, height=500)
+    if 'page' not in st.session_state:
+        st.session_state.page = 1
+
+    # Only stages whose inputs changed since the last rerun are recomputed
+    occupancy_tick = refresh_tick(occupancy) if occupancy is not None else 0
+    stay = (datetime.datetime.combine(stay_date, stay_time), stay_hours) if open_during else None
+    with profiling.stage("parking.filter"):
+        stages = parking_pipeline().run(df, {
+            "distance": (st.session_state.user_lat, st.session_state.user_lon, index, len(df)),
+            "radius": (max_dist,),
+            "fee": (fee_range,),
+            "flags": (ev_only, open_weekend, cashless_payment),
+            "availability": (availability, stay),
+            "sort": (sort_method,),
+            "occupancy": (occupancy, occupancy_tick, free_only),
+            "page": (st.session_state.page,),
+        }, keys=result_keys(data_key, st.session_state.user_lat, st.session_state.user_lon, max_dist, fee_range,
+                            (ev_only, open_weekend, cashless_payment), stay, sort_method))
+    filtered = stages["occupancy"]
+
+    # Display map; a garage is routed only once the user selects it
+    selected = st.session_state.get("selected_garage")
+    if selected not in filtered.index:
+        selected = None
+    # Only garages inside the current viewport are sent to the browser; the
+    # base map stays the same, so st_folium swaps the layer without resetting the view
+    lat, lon = st.session_state.user_lat, st.session_state.user_lon
+    bounds, zoom = current_view(lat, lon)
+    visible = filtered[in_viewport(filtered, bounds) | (filtered.index == selected)]
+    with profiling.stage("parking.layer"):
+        if zoom < LOD_ZOOM and len(visible) > LOD_MIN_MARKERS:
+            layer = aggregate_layer(aggregate_markers(visible, zoom))
+        else:
+            if eager_routes:
+                # Keep this origin's route summaries warm in the background
+                get_refresh_worker().route_origins.add(lat, lon)
+            layer = garage_layer(lat, lon, visible, eager_routes=eager_routes, selected=selected, cluster=cluster_markers,
+                                  occupancy_tick=occupancy_tick, data_key=data_key)
+    with profiling.stage("parking.st_folium"):
+        map_state = st_folium(base_map(lat, lon), key="parking_map", width=MAP_WIDTH, height=MAP_HEIGHT,
+                              feature_group_to_add=layer,
+                              returned_objects=["last_object_clicked", "bounds", "zoom"])
+    st.session_state.map_origin = (lat, lon)
+    if len(visible) < len(filtered):
+        st.caption(f"Showing {len(visible)} of {len(filtered)} parking spots in the current map view.")
+
+    clicked = (map_state or {}).get("last_object_clicked")
+    if clicked and clicked != st.session_state.get("last_map_click"):
+        st.session_state.last_map_click = clicked
+        label = find_garage(filtered, clicked['lat'], clicked['lng'])
+        if label is not None and label != selected:
+            st.session_state.selected_garage = label
+            st.rerun()
 
     # Statistics row below the map
     if not filtered.empty:
@@ -201,42 +517,45 @@ def parking_finder_tab(df):
             """, unsafe_allow_html=True)
     else:
         st.warning("No matching parking spots found.")
+        if partitions is not None:
+            # Searches every city, nearest first, ignoring the filters
+            nearest = partitions.nearest(st.session_state.user_lat, st.session_state.user_lon, 1)
+            for _, row in nearest.iterrows():
+                st.info(f"The closest parking is {row['name']} in {row['city']}, {row['distance']:.1f} km away.")
 
-    # Apply sorting
-    if not filtered.empty:
-        if sort_method == "Closest Distance":
-            filtered = filtered.sort_values('distance')
-        elif sort_method == "Lowest Fee":
-            filtered = filtered.sort_values('fee_per_hour')
-        filtered = filtered.reset_index(drop=True)
-
-    # Pagination
-    if 'page' not in st.session_state:
-        st.session_state.page = 1
-    start_idx = (st.session_state.page - 1) * 10
-    end_idx = start_idx + 10
-    total_pages = (len(filtered) - 1) // 10 + 1
+    # Pagination over the memoized sorted result
+    total_pages = (len(filtered) - 1) // PAGE_SIZE + 1
 
     # Display parking spots list
     st.subheader("📍 Available Parking Spots")
-    for _, row in filtered.iloc[start_idx:end_idx].iterrows():
-        with st.expander(f"🚗 {row['name']} - €{row['fee_per_hour']}/h ({row['distance']:.2f} km)"):
-            col1, col2 = st.columns([1, 1])
-            with col1:
-                st.markdown(f"**📍 Address:** {row['address']}")
-                st.markdown(f"**💰 Price:** €{row['fee_per_hour']}/hour")
-                st.markdown(f"**📏 Distance:** {row['distance']:.2f} km")
-                st.markdown(f"**🅿️ Total Spots:** {row['total_spots']}")
-            with col2:
-                st.markdown(f"**⚡ EV Charging:** {'✅ Yes' if row['ev_charging'] else '❌ No'}")
-                st.markdown(f"**📅 Open Weekends:** {'✅ Yes' if row['open_weekend'] else '❌ No'}")
-                st.markdown(f"**💳 Cashless Payment:** {'✅ Yes' if row['cashless_payment'] else '❌ No'}")
-                if 'opening_hours' in row:
-                    st.markdown(f"**🕒 Hours:** {row['opening_hours']}")
-            st.markdown(
-                f"[🗺️ Open in Google Maps](https://www.google.com/maps/dir/?api=1&origin={st.session_state.user_lat},{st.session_state.user_lon}&destination={row['lat']},{row['lon']}&travelmode=driving)",
-                unsafe_allow_html=True
-            )
+    with profiling.stage("parking.list"):
+        for label, row in stages["page"].iterrows():
+            with st.expander(f"🚗 {row['name']} - €{row['fee_per_hour']}/h ({row['distance']:.2f} km)"):
+                col1, col2 = st.columns([1, 1])
+                with col1:
+                    st.markdown(f"**📍 Address:** {row['address']}")
+                    st.markdown(f"**💰 Price:** €{row['fee_per_hour']}/hour")
+                    st.markdown(f"**📏 Distance:** {row['distance']:.2f} km")
+                    if row['free_spots'] >= 0:
+                        st.markdown(f"**🅿️ Free Spots:** {row['free_spots']} of {row['total_spots']}")
+                    else:
+                        st.markdown(f"**🅿️ Total Spots:** {row['total_spots']}")
+                with col2:
+                    st.markdown(f"**⚡ EV Charging:** {'✅ Yes' if row['ev_charging'] else '❌ No'}")
+                    st.markdown(f"**📅 Open Weekends:** {'✅ Yes' if row['open_weekend'] else '❌ No'}")
+                    st.markdown(f"**💳 Cashless Payment:** {'✅ Yes' if row['cashless_payment'] else '❌ No'}")
+                    st.markdown(f"**🕒 Hours:** {hours_label(row['open_time'], row['close_time'])}")
+                if label == selected:
+                    route, route_dist, route_dur = get_route(st.session_state.user_lon, st.session_state.user_lat, row['lon'], row['lat'])
+                    if route_dist:
+                        st.markdown(f"**🧭 Driving:** {route_dist:.1f} km, about {route_dur:.0f} min")
+                elif st.button("🧭 Show driving route", key=f"route_{label}"):
+                    st.session_state.selected_garage = label
+                    st.rerun()
+                st.markdown(
+                    f"[🗺️ Open in Google Maps](https://www.google.com/maps/dir/?api=1&origin={st.session_state.user_lat},{st.session_state.user_lon}&destination={row['lat']},{row['lon']}&travelmode=driving)",
+                    unsafe_allow_html=True
+                )
 
     # Pagination controls
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -0,0 +1,274 @@
+"""Live occupancy: latest free spots per garage from a pluggable feed.
+
+A source yields batches of (garage_key, free_spots, timestamp) updates,
+where garage_key is the stable id data.garage_keys derives for each
+garage. A background OccupancyConsumer applies them to an array-backed
+OccupancyStore, which the Streamlit script reads without waiting on the
+feed. The feed is picked by SMARTPARK_OCCUPANCY_FEED:
+
+    file:updates.csv       tail a file of "garage_key,free_spots,timestamp" lines
+    tcp:host:port          read the same lines from a socket
+    stub                   random-walk updates, shaped like DATEX II
+                           parking status records
+"""
+import datetime
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from refresh import current_parking
+
+OCCUPANCY_FEED = os.environ.get("SMARTPARK_OCCUPANCY_FEED", "")
+UNKNOWN = -1
+# Readings older than this are treated as unknown
+STALE_AFTER_S = 15 * 60
+# Popups and filters pick up new readings at most this often
+REFRESH_S = 30
+
+
+class OccupancyStore:
+    """Latest free-spot count and timestamp per garage, in flat arrays.
+
+    Garages are addressed by garage_key. Each known key owns a slot in the
+    arrays; keys the store has not been told about are ignored by apply
+    and unknown to lookup.
+    """
+
+    def __init__(self, keys=()):
+        self.keys = pd.Index([], dtype=np.int64)
+        self.free = np.empty(0, dtype=np.int32)
+        self.updated_at = np.empty(0)
+        self.version = 0
+        self.updates = 0
+        self._tracked = None
+        self._lock = threading.Lock()
+        self.track(keys)
+
+    def __len__(self):
+        return len(self.free)
+
+    def track(self, keys, token=None):
+        """Give slots to keys not seen yet, e.g. garages added by a data refresh.
+
+        Readings for known keys are kept. A repeated token (such as the
+        dataset fingerprint) returns at once.
+        """
+        if token is not None and token == self._tracked:
+            return
+        keys = pd.Index(np.asarray(keys, dtype=np.int64))
+        new = keys[self.keys.get_indexer(keys) < 0].unique()
+        with self._lock:
+            if len(new):
+                self.keys = self.keys.append(new)
+                self.free = np.concatenate([self.free, np.full(len(new), UNKNOWN, dtype=np.int32)])
+                self.updated_at = np.concatenate([self.updated_at, np.full(len(new), -np.inf)])
+            self._tracked = token
+
+    def slots(self, keys):
+        """Array slot per garage key, -1 for keys the store doesn't know."""
+        return self.keys.get_indexer(np.asarray(keys, dtype=np.int64))
+
+    def apply(self, keys, free, timestamps):
+        """Apply a batch of updates, keeping only readings newer than stored ones."""
+        with self._lock:
+            ids = self.slots(keys)
+        free = np.asarray(free, dtype=np.int32)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        valid = ids >= 0
+        ids, free, timestamps = ids[valid], free[valid], timestamps[valid]
+        # Latest reading per garage within the batch
+        order = np.argsort(timestamps, kind="stable")
+        ids, free, timestamps = ids[order], free[order], timestamps[order]
+        _, last = np.unique(ids[::-1], return_index=True)
+        keep = len(ids) - 1 - last
+        ids, free, timestamps = ids[keep], free[keep], timestamps[keep]
+        with self._lock:
+            newer = timestamps > self.updated_at[ids]
+            self.free[ids[newer]] = free[newer]
+            self.updated_at[ids[newer]] = timestamps[newer]
+            self.version += 1
+            self.updates += int(newer.sum())
+        return int(newer.sum())
+
+    def lookup(self, keys, max_age=STALE_AFTER_S, now=None):
+        """Free spots for the garage keys, UNKNOWN where missing or stale."""
+        now = time.time() if now is None else now
+        with self._lock:
+            ids = self.slots(keys)
+            known = ids >= 0
+            ids = np.where(known, ids, 0)
+            if not len(self.free):
+                return np.full(len(ids), UNKNOWN, dtype=np.int32)
+            free = self.free[ids]
+            fresh = self.updated_at[ids] >= now - max_age
+        return np.where(fresh & known, free, UNKNOWN)
+
+
+def parse_timestamp(value):
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def parse_lines(lines):
+    """(keys, free, timestamps) arrays from "garage_key,free_spots,timestamp" lines."""
+    ids, free, timestamps = [], [], []
+    for line in lines:
+        parts = line.strip().split(",")
+        if len(parts) != 3:
+            continue
+        try:
+            update = int(parts[0]), int(parts[1]), parse_timestamp(parts[2])
+        except ValueError:
+            continue
+        ids.append(update[0])
+        free.append(update[1])
+        timestamps.append(update[2])
+    return ids, free, timestamps
+
+
+class FileTailSource:
+    """Batches of the lines appended to a file since the last poll."""
+
+    def __init__(self, path, poll=0.5, from_start=False):
+        self.path = path
+        self.poll = poll
+        self.from_start = from_start
+
+    def __iter__(self):
+        while not os.path.exists(self.path):
+            time.sleep(self.poll)
+        with open(self.path) as f:
+            if not self.from_start:
+                f.seek(0, os.SEEK_END)
+            pending = ""
+            while True:
+                chunk = f.read()
+                if not chunk:
+                    time.sleep(self.poll)
+                    continue
+                *lines, pending = (pending + chunk).split("\n")
+                yield parse_lines(lines)
+
+
+class SocketSource:
+    """Batches of lines read from a TCP feed, reconnecting when it drops."""
+
+    def __init__(self, host, port, retry=5.0):
+        self.address = (host, int(port))
+        self.retry = retry
+
+    def __iter__(self):
+        while True:
+            try:
+                with socket.create_connection(self.address) as conn:
+                    pending = b""
+                    while True:
+                        chunk = conn.recv(65536)
+                        if not chunk:
+                            break
+                        *lines, pending = (pending + chunk).split(b"\n")
+                        yield parse_lines(line.decode("utf-8", "replace") for line in lines)
+            except OSError:
+                pass
+            time.sleep(self.retry)
+
+
+class StubFeed:
+    """Random-walk occupancy for every garage, for demos and benchmarks.
+
+    Each update corresponds to a DATEX II parking status record:
+    parkingSiteId -> garage_key, numberOfVacantParkingSpaces -> free_spots,
+    lastUpdated -> timestamp.
+    """
+
+    def __init__(self, keys, capacities, updates_per_second=1000, interval=0.1, seed=None):
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.capacities = np.asarray(capacities, dtype=np.int32)
+        self.batch = max(1, int(updates_per_second * interval))
+        self.interval = interval
+        self.rng = np.random.default_rng(seed)
+        self.free = (self.capacities * self.rng.random(len(self.capacities))).astype(np.int32)
+
+    def __iter__(self):
+        while True:
+            ids = self.rng.integers(0, len(self.capacities), self.batch)
+            step = self.rng.integers(-3, 4, self.batch)
+            np.add.at(self.free, ids, step)
+            np.clip(self.free, 0, self.capacities, out=self.free)
+            yield self.keys[ids], self.free[ids], np.full(self.batch, time.time())
+            time.sleep(self.interval)
+
+
+class OccupancyConsumer(threading.Thread):
+    """Daemon thread that feeds one source into a store."""
+
+    def __init__(self, store, source, retry=5.0):
+        super().__init__(name="occupancy-consumer", daemon=True)
+        self.store = store
+        self.source = source
+        self.retry = retry
+        self.errors = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                for batch in self.source:
+                    if self._stop_event.is_set():
+                        return
+                    if len(batch[0]):
+                        self.store.apply(*batch)
+            except Exception:
+                # A bad feed must not take the app down; retry from scratch
+                self.errors += 1
+            self._stop_event.wait(self.retry)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def source_from_url(url, keys, capacities):
+    kind, _, target = url.partition(":")
+    if kind == "file":
+        return FileTailSource(target)
+    if kind == "tcp":
+        host, _, port = target.rpartition(":")
+        return SocketSource(host, port)
+    if kind == "stub":
+        return StubFeed(keys, capacities)
+    raise ValueError(f"Unknown occupancy feed: {url}")
+
+
+@st.cache_resource
+def occupancy_store(feed=OCCUPANCY_FEED):
+    # One store and consumer per process; without a feed every garage stays unknown
+    frame = current_parking().frame
+    store = OccupancyStore(frame['garage_key'].to_numpy())
+    if feed:
+        source = source_from_url(feed, frame['garage_key'].to_numpy(), frame['total_spots'].to_numpy())
+        OccupancyConsumer(store, source).start()
+    return store
+
+
+def load_occupancy(feed=OCCUPANCY_FEED):
+    store = occupancy_store(feed)
+    # Garages added by a data refresh get slots; a no-op until the data changes
+    dataset = current_parking()
+    store.track(dataset.frame['garage_key'].to_numpy(), dataset.fingerprint)
+    return store
+
+
+def refresh_tick(store):
+    # Changes every REFRESH_S while updates arrive, so cached results expire with it
+    return int(time.time() // REFRESH_S) if store.updates else 0
+
+
+def with_free_spots(df, store, max_age=STALE_AFTER_S):
+    return df.assign(free_spots=store.lookup(df['garage_key'].to_numpy(), max_age))
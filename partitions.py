@@ -0,0 +1,172 @@
+"""Per-city partitions of the parking table.
+
+A small catalogue (garage count, centre and bounding box per city) is
+derived from the data when it loads. A city's rows and spatial index are
+only materialised the first time a search reaches that city, so the work
+of a rerun scales with the cities around the user, not with the country.
+Searches near a city border cover every partition within reach.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from geo import haversine
+from spatial import GridIndex
+
+# Combined frames kept for recently searched sets of partitions
+MAX_SCOPES = 16
+# pandas 3 always copies on write; before that a shallow copy can write through
+COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3
+
+
+def frame_view(frame):
+    """A frame of the caller's own that never writes through to `frame`.
+
+    Zero-copy under copy-on-write, where column buffers are shared until
+    someone writes to them; a deep copy on older pandas.
+    """
+    return frame.copy(deep=not COPY_ON_WRITE)
+
+
+class CityPartition:
+    """One city's garages, with the row labels and garage ids of the full table."""
+
+    def __init__(self, city, frame):
+        self.city = city
+        self.frame = frame
+        self.index = GridIndex.from_frame(frame)
+
+    def __len__(self):
+        return len(self.frame)
+
+
+class SearchScope:
+    """The partitions a search covers, as one frame with a matching index."""
+
+    def __init__(self, cities, frame, index, key):
+        self.cities = cities
+        self.frame = frame
+        self.index = index
+        # Plain value identifying the rows, for shared result caches
+        self.key = key
+
+    def view(self):
+        return frame_view(self.frame)
+
+    def __len__(self):
+        return len(self.frame)
+
+
+def catalog_from_frame(df):
+    """Per city: garages, median position as its centre, and bounding box."""
+    columns = ['garages', 'lat', 'lon', 'lat_min', 'lat_max', 'lon_min', 'lon_max']
+    located = df[df['city'].notna() & df['lat'].notna() & df['lon'].notna()]
+    if located.empty:
+        return pd.DataFrame(columns=columns)
+    grouped = located.groupby('city', observed=True)
+    catalog = pd.concat([
+        grouped.size().rename('garages'),
+        grouped['lat'].median(), grouped['lon'].median(),
+        grouped['lat'].min().rename('lat_min'), grouped['lat'].max().rename('lat_max'),
+        grouped['lon'].min().rename('lon_min'), grouped['lon'].max().rename('lon_max'),
+    ], axis=1)
+    catalog.index = pd.Index(catalog.index.astype(str), name='city')
+    return catalog[columns].astype({'lat': 'float64', 'lon': 'float64'}).sort_index()
+
+
+class ParkingPartitions:
+    def __init__(self, frame, key=None, max_scopes=MAX_SCOPES):
+        self.frame = frame
+        self.key = key
+        self.max_scopes = max_scopes
+        self.catalog = catalog_from_frame(frame)
+        self._positions = None
+        self._partitions = {}
+        self._scopes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cities(self):
+        return list(self.catalog.index)
+
+    def center(self, city):
+        """(lat, lon) of the city's garages, or None for an unknown city."""
+        if city not in self.catalog.index:
+            return None
+        row = self.catalog.loc[city]
+        return float(row['lat']), float(row['lon'])
+
+    def loaded(self):
+        return list(self._partitions)
+
+    def partition(self, city):
+        with self._lock:
+            part = self._partitions.get(city)
+            if part is None:
+                if self._positions is None:
+                    # Row positions per city, from the city codes alone
+                    self._positions = self.frame.groupby('city', observed=True).indices
+                part = CityPartition(city, self.frame.iloc[self._positions.get(city, [])])
+                self._partitions[city] = part
+            return part
+
+    def bbox_distance(self, lat, lon):
+        """Distance in km from the origin to each city's bounding box (0 inside it)."""
+        catalog = self.catalog
+        nearest_lat = np.clip(lat, catalog['lat_min'].to_numpy(), catalog['lat_max'].to_numpy())
+        nearest_lon = np.clip(lon, catalog['lon_min'].to_numpy(), catalog['lon_max'].to_numpy())
+        return pd.Series(haversine(lat, lon, nearest_lat, nearest_lon), index=catalog.index)
+
+    def cities_near(self, lat, lon, radius_km):
+        distance = self.bbox_distance(lat, lon)
+        return list(distance.index[distance <= radius_km])
+
+    def around(self, lat, lon, radius_km):
+        """SearchScope over every partition that may hold garages within radius_km."""
+        return self.scope(self.cities_near(lat, lon, radius_km))
+
+    def scope(self, cities):
+        cities = tuple(sorted(set(cities)))
+        with self._lock:
+            scope = self._scopes.get(cities)
+            if scope is not None:
+                self._scopes.move_to_end(cities)
+                return scope
+        if cities and len(cities) == len(self.catalog):
+            # Every city: index the full table instead of concatenating its partitions
+            frame = self.frame
+            index = GridIndex.from_frame(frame)
+        elif len(cities) == 1:
+            part = self.partition(cities[0])
+            frame, index = part.frame, part.index
+        else:
+            parts = [self.partition(city) for city in cities]
+            frame = pd.concat([part.frame for part in parts]) if parts else self.frame.iloc[:0]
+            index = GridIndex.from_frame(frame)
+        scope = SearchScope(cities, frame, index, (self.key, cities))
+        with self._lock:
+            self._scopes[cities] = scope
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        return scope
+
+    def nearest(self, lat, lon, k=1):
+        """The k closest garages in any city, closest first, with a distance column.
+
+        Partitions are visited nearest bounding box first and the search
+        stops once the next box is farther away than the k-th hit so far.
+        """
+        found = []
+        for city, box_km in self.bbox_distance(lat, lon).sort_values().items():
+            if len(found) >= k and box_km > found[k - 1][0]:
+                break
+            part = self.partition(city)
+            positions, distances = part.index.nearest(lat, lon, k)
+            found.extend((d, city, p) for d, p in zip(distances, positions))
+            found.sort(key=lambda hit: hit[0])
+            del found[k:]
+        if not found:
+            return self.frame.iloc[:0].assign(distance=np.empty(0))
+        rows = [self._partitions[city].frame.iloc[[p]] for _, city, p in found]
+        return pd.concat(rows).assign(distance=[d for d, _, _ in found])
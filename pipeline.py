@@ -0,0 +1,88 @@
+_MISSING = object()
+
+
+class StagePipeline:
+    """A chain of memoized stages.
+
+    Each stage is (name, fn) and is called as fn(previous_output, *args)
+    with the args given for it in run(). A stage is recomputed only when its
+    args changed or an upstream stage was recomputed; otherwise its last
+    output is reused.
+
+    With a shared cache (see result_cache.ResultCache), the leading stages
+    that run() is given plain keys for are answered as one unit: the output
+    of the last keyed stage is looked up under all their keys before
+    anything is computed, so sessions asking the same question share one
+    result. encode(output) turns that output into the cached tuple of arrays
+    and decode(source, cached) rebuilds it.
+    """
+
+    def __init__(self, stages, shared=None, encode=None, decode=None):
+        self.stages = list(stages)
+        self.shared = shared
+        self.encode = encode
+        self.decode = decode
+        self._args = {}
+        self._outputs = {}
+        self.recomputed = []
+        self.shared_hits = []
+
+    def run(self, source, args, keys=None):
+        """Run all stages and return {stage name: output}.
+
+        keys maps stage names to hashable, plain-valued keys; only the
+        leading run of stages that all have keys is shared.
+        """
+        keys = keys or {}
+        names = [name for name, _ in self.stages]
+        self.recomputed = []
+        self.shared_hits = []
+        first = next((i for i, name in enumerate(names)
+                      if name not in self._outputs or self._args[name] != tuple(args[name])), len(names))
+        shared = 0
+        while self.shared is not None and shared < len(names) and names[shared] in keys:
+            shared += 1
+        shared_key = tuple((name, keys[name]) for name in names[:shared])
+
+        start, value, dirty = 0, source, False
+        if shared and first < shared:
+            cached = self.shared.get(shared_key)
+            if cached is not None:
+                # Upstream outputs stay unknown until a later change needs them
+                for name in names[:shared]:
+                    self._args[name] = tuple(args[name])
+                    self._outputs[name] = _MISSING
+                value = self.decode(source, cached)
+                self._outputs[names[shared - 1]] = value
+                self.shared_hits.append(names[shared - 1])
+                start, dirty = shared, True
+
+        for i in range(start, len(names)):
+            name, fn = self.stages[i]
+            stage_args = tuple(args[name])
+            if dirty or name not in self._outputs or self._args[name] != stage_args:
+                if value is _MISSING:
+                    value = self._rebuild(source, args, i)
+                value = fn(value, *stage_args)
+                self._args[name] = stage_args
+                self._outputs[name] = value
+                self.recomputed.append(name)
+                dirty = True
+                if i == shared - 1:
+                    self.shared.put(shared_key, self.encode(value))
+            else:
+                value = self._outputs[name]
+        return {name: output for name, output in self._outputs.items() if output is not _MISSING}
+
+    def _rebuild(self, source, args, stop):
+        # Recompute the stages before `stop` whose outputs came from the shared cache
+        value = source
+        for name, fn in self.stages[:stop]:
+            value = fn(value, *args[name])
+            self._outputs[name] = value
+            self.recomputed.append(name)
+        return value
+
+    def clear(self):
+        self._args.clear()
+        self._outputs.clear()
@@ -0,0 +1,87 @@
+"""Builds plz_centroids.csv, the postal code table used for offline PLZ lookups.
+
+The shipped table holds the centroid of every German 5-digit PLZ area,
+from the georef-germany-postleitzahl dataset (PLZ polygons from
+OpenStreetMap, © OpenStreetMap contributors, ODbL) as packaged in the
+zipcode-coordinates package on PyPI. Rebuild it with:
+
+    pip install zipcode-coordinates
+    python postal_codes.py [--out plz_centroids.csv]
+
+The GeoNames postal code dump for Germany (CC BY 4.0,
+https://download.geonames.org/export/zip/DE.zip) works as well; a PLZ
+covering several places then gets the mean of their positions:
+
+    python postal_codes.py --source DE.zip     # or DE.txt, or "geonames" to download it
+
+geocode.load_plz_centroids reads the result.
+"""
+import argparse
+import io
+import os
+import urllib.request
+import zipfile
+
+import pandas as pd
+
+GEONAMES_URL = "https://download.geonames.org/export/zip/DE.zip"
+PLZ_CSV = os.environ.get("SMARTPARK_PLZ_CSV", "plz_centroids.csv")
+# Tab-separated, no header; see the readme.txt inside the GeoNames archive
+GEONAMES_COLUMNS = ['country', 'plz', 'place', 'admin1', 'admin1_code', 'admin2', 'admin2_code',
+                    'admin3', 'admin3_code', 'lat', 'lon', 'accuracy']
+
+
+def read_geonames(source):
+    """GeoNames rows from a DE.zip archive, its DE.txt, or a file-like object."""
+    if isinstance(source, str) and source.endswith(".zip"):
+        with zipfile.ZipFile(source) as archive:
+            return read_geonames(io.BytesIO(archive.read("DE.txt")))
+    return pd.read_csv(source, sep="\t", header=None, names=GEONAMES_COLUMNS,
+                       usecols=['country', 'plz', 'lat', 'lon'], dtype={'plz': str}, keep_default_na=False)
+
+
+def read_plz_areas():
+    """PLZ area centroids from the zipcode-coordinates package, as GeoNames-shaped rows."""
+    from zipcode_coordinates import coordinates
+
+    plz = list(coordinates)
+    return pd.DataFrame({
+        'country': 'DE',
+        'plz': plz,
+        'lat': [coordinates[code][0] for code in plz],
+        'lon': [coordinates[code][1] for code in plz],
+    })
+
+
+def build_centroids(rows):
+    """(plz, lat, lon) per German 5-digit postal code, sorted by plz."""
+    rows = rows[(rows['country'] == 'DE') & rows['plz'].str.fullmatch(r"\d{5}")]
+    centroids = rows.groupby('plz', sort=True)[['lat', 'lon']].mean().round(5)
+    return centroids.reset_index()
+
+
+def download(url=GEONAMES_URL):
+    with urllib.request.urlopen(url, timeout=60) as response:
+        data = response.read()
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        return io.BytesIO(archive.read("DE.txt"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", help="GeoNames DE.zip or DE.txt, or \"geonames\" to download it; "
+                                         "PLZ areas from zipcode-coordinates when omitted")
+    parser.add_argument("--out", default=PLZ_CSV)
+    args = parser.parse_args()
+
+    if args.source is None:
+        rows = read_plz_areas()
+    else:
+        rows = read_geonames(download() if args.source == "geonames" else args.source)
+    centroids = build_centroids(rows)
+    centroids.to_csv(args.out, index=False)
+    print(f"{len(centroids):,} postal codes -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Per-rerun timing of named stages plus call and cache counters.
+
+Off unless SMARTPARK_PROFILE is set, and then:
+
+    SMARTPARK_PROFILE=file     append one JSON trace per rerun to SMARTPARK_TRACE_FILE
+    SMARTPARK_PROFILE=panel    show the last trace in a sidebar debug panel
+    SMARTPARK_PROFILE=all      both
+
+When off, stage() hands back one shared no-op context manager and
+traced() returns the function unchanged, so the hooks can stay in place.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+
+PROFILE = os.environ.get("SMARTPARK_PROFILE", "")
+ENABLED = bool(PROFILE)
+TRACE_FILE = os.environ.get("SMARTPARK_TRACE_FILE", os.path.join(".cache", "traces.jsonl"))
+
+_NULL = contextlib.nullcontext()
+_local = threading.local()
+_file_lock = threading.Lock()
+# name -> fn() returning a cumulative count, sampled at the start and end of a rerun
+_counters = {}
+
+
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.spans = []
+        self.counts = {}
+        self.depth = 0
+        self.baseline = {key: fn() for key, fn in _counters.items()}
+        self.total_ms = None
+
+    @contextlib.contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            self.spans.append({"name": name, "depth": self.depth,
+                               "start_ms": (start - self._t0) * 1000,
+                               "ms": (time.perf_counter() - start) * 1000})
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self._t0) * 1000
+        for key, fn in _counters.items():
+            delta = fn() - self.baseline.get(key, 0)
+            if delta:
+                self.counts[key] = self.counts.get(key, 0) + delta
+        self.spans.sort(key=lambda span: span["start_ms"])
+        return self
+
+    def to_dict(self):
+        return {"trace": self.name, "started": self.started, "total_ms": self.total_ms,
+                "spans": self.spans, "counts": self.counts}
+
+
+def register_counter(name, fn):
+    """Track a cumulative counter (e.g. cache hits) as a per-rerun delta."""
+    if ENABLED:
+        _counters[name] = fn
+
+
+def current():
+    return getattr(_local, "trace", None)
+
+
+def stage(name):
+    """Context manager timing one named stage of the current rerun."""
+    if not ENABLED:
+        return _NULL
+    trace = current()
+    return trace.span(name) if trace is not None else _NULL
+
+
+def traced(name):
+    """Decorator form of stage(); a no-op wrapper is never created when off."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        wrapper.__wrapped__ = fn
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    if ENABLED:
+        trace = current()
+        if trace is not None:
+            trace.counts[name] = trace.counts.get(name, 0) + n
+
+
+@contextlib.contextmanager
+def rerun(name="rerun"):
+    """Trace everything inside as one rerun; exported when the block exits."""
+    if not ENABLED:
+        yield None
+        return
+    _local.trace = trace = Trace(name)
+    try:
+        yield trace
+    finally:
+        _local.trace = None
+        trace.finish()
+        if PROFILE in ("file", "all"):
+            write_trace(trace)
+
+
+def write_trace(trace, path=None):
+    path = path or TRACE_FILE
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps(trace.to_dict())
+    with _file_lock, open(path, "a") as f:
+        f.write(line + "\n")
+
+
+def render_panel(st, trace):
+    """Sidebar table of a finished trace's stages and counters."""
+    if PROFILE not in ("panel", "all"):
+        return
+    with st.sidebar.expander("🛠️ Rerun profile", expanded=False):
+        if trace is None or trace.total_ms is None:
+            st.caption("No rerun traced yet in this session.")
+            return
+        st.caption(f"Previous rerun: {trace.total_ms:.0f} ms")
+        st.dataframe([{"stage": "  " * span["depth"] + span["name"], "ms": round(span["ms"], 1)}
+                      for span in trace.spans], hide_index=True)
+        if trace.counts:
+            st.json(trace.counts)
@@ -0,0 +1,253 @@
+"""Background refresh of parking, fuel and route data.
+
+A RefreshWorker runs each RefreshJob on its own schedule in a thread pool,
+with a timeout, retries and a circuit breaker per job. Every successful run
+publishes an immutable Snapshot that readers pick up with a single
+dictionary lookup, so a rerun never waits on upstream I/O. Set
+SMARTPARK_REFRESH=0 to keep the data loaded at startup.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from circuit import CircuitBreaker, CircuitOpen, with_retries
+
+REFRESH_ENABLED = os.environ.get("SMARTPARK_REFRESH", "1") != "0"
+
+Snapshot = namedtuple("Snapshot", ["value", "version", "refreshed_at"])
+
+
+class RefreshJob:
+    """fetch(current_value) -> new value; returning current_value publishes nothing."""
+
+    def __init__(self, name, fetch, interval, timeout=60, attempts=3, backoff=1.0, breaker=None):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.timeout = timeout
+        self.attempts = attempts
+        self.backoff = backoff
+        self.breaker = breaker if breaker is not None else CircuitBreaker(name)
+        self.next_run = 0.0
+        self.started_at = None
+        self.generation = 0
+        self.runs = 0
+        self.failures = 0
+        self.last_error = None
+
+
+class RefreshWorker:
+    def __init__(self, max_workers=4, tick=1.0):
+        self.tick = tick
+        self.jobs = {}
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refresh")
+        self._thread = None
+
+    def add(self, job, initial=None):
+        self.jobs[job.name] = job
+        if initial is not None:
+            self.publish(job.name, initial)
+        job.next_run = time.monotonic() + job.interval
+
+    def publish(self, name, value):
+        with self._lock:
+            previous = self._snapshots.get(name)
+            snapshot = Snapshot(value, previous.version + 1 if previous else 1, time.time())
+            # Replace the whole mapping so readers never see a half-updated one
+            self._snapshots = {**self._snapshots, name: snapshot}
+        return snapshot
+
+    def snapshot(self, name):
+        return self._snapshots.get(name)
+
+    def get(self, name, default=None):
+        snapshot = self._snapshots.get(name)
+        return snapshot.value if snapshot is not None else default
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="refresh-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def run_now(self, name):
+        """Run one job synchronously, e.g. from a script or test."""
+        job = self.jobs[name]
+        job.started_at = time.monotonic()
+        job.generation += 1
+        self._run(job, job.generation)
+
+    def _loop(self):
+        while not self._stop_event.wait(self.tick):
+            now = time.monotonic()
+            for job in self.jobs.values():
+                if job.started_at is not None:
+                    if now - job.started_at <= job.timeout:
+                        continue
+                    # Abandon the stuck run; its result is dropped by generation
+                    self._failed(job, TimeoutError(f"{job.name} refresh timed out after {job.timeout}s"))
+                if now >= job.next_run:
+                    job.started_at = now
+                    job.generation += 1
+                    try:
+                        self._pool.submit(self._run, job, job.generation)
+                    except RuntimeError:
+                        # Pool shut down with the interpreter
+                        return
+
+    def _run(self, job, generation):
+        current = self.get(job.name)
+        try:
+            value = with_retries(lambda: job.breaker.call(job.fetch, current),
+                                 attempts=job.attempts, backoff=job.backoff)
+        except CircuitOpen as e:
+            if generation == job.generation:
+                job.last_error = str(e)
+                self._done(job)
+            return
+        except Exception as e:
+            if generation == job.generation:
+                self._failed(job, e)
+            return
+        if generation != job.generation:
+            return
+        if value is not current:
+            self.publish(job.name, value)
+        job.runs += 1
+        job.last_error = None
+        self._done(job)
+
+    def _failed(self, job, error):
+        job.failures += 1
+        job.last_error = str(error)
+        self._done(job)
+
+    def _done(self, job):
+        job.started_at = None
+        job.next_run = time.monotonic() + job.interval
+
+    def status(self):
+        return {name: {"version": getattr(self.snapshot(name), "version", 0), "runs": job.runs,
+                       "failures": job.failures, "circuit": job.breaker.state, "last_error": job.last_error}
+                for name, job in self.jobs.items()}
+
+
+def file_stamp(*paths):
+    # Cheap change detection: (mtime, size) per path, None where missing
+    stamps = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamps.append(None)
+    return tuple(stamps)
+
+
+class RecentOrigins:
+    """Bounded set of route origins that sessions asked about lately."""
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._origins = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, lat, lon):
+        key = (round(float(lat), 5), round(float(lon), 5))
+        with self._lock:
+            self._origins[key] = None
+            self._origins.move_to_end(key)
+            while len(self._origins) > self.maxsize:
+                self._origins.popitem(last=False)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._origins))
+
+
+def parking_job(path):
+    from data import ParkingDataset, read_parking
+
+    stamp = [file_stamp(path)]
+
+    def fetch(current):
+        new_stamp = file_stamp(path)
+        if current is not None and new_stamp == stamp[0]:
+            return current
+        dataset = ParkingDataset(read_parking(path))
+        stamp[0] = new_stamp
+        return dataset
+
+    return RefreshJob("parking", fetch, interval=60, timeout=300)
+
+
+def fuel_job(path):
+    from fuel_ingest import STORE_NAME, read_store
+    from fuel_service import FuelService
+    from snapshot import SNAPSHOT_DIR
+
+    store_meta = os.path.join(SNAPSHOT_DIR, STORE_NAME, "meta.json")
+    stamp = [file_stamp(path, store_meta)]
+
+    def fetch(current):
+        new_stamp = file_stamp(path, store_meta)
+        if current is not None and new_stamp == stamp[0]:
+            return current
+        cities = {city.casefold(): frame for city, frame in read_store().items()}
+        service = FuelService(path, cities)
+        # Build the national series here rather than on a user's rerun
+        service.series(None)
+        stamp[0] = new_stamp
+        return service
+
+    return RefreshJob("fuel", fetch, interval=300, timeout=300)
+
+
+def routes_job(worker, router, origins, radius_km):
+    def fetch(current):
+        # Re-resolve recent origins so their route summaries stay cached
+        dataset = worker.get("parking")
+        if dataset is None:
+            return current
+        recent = list(origins)
+        warmed = 0
+        for lat, lon in recent:
+            scope = dataset.partitions.around(lat, lon, radius_km)
+            positions, _ = scope.index.within(lat, lon, radius_km)
+            rows = scope.frame.iloc[positions]
+            router.summaries((lat, lon), list(zip(rows['lat'], rows['lon'])))
+            warmed += len(rows)
+        return {"origins": len(recent), "garages": warmed, "cached": len(router.cache)}
+
+    return RefreshJob("routes", fetch, interval=600, timeout=120, attempts=1)
+
+
+@st.cache_resource
+def get_refresh_worker():
+    from data import PARKING_CSV, FUEL_CSV, load_parking
+    from fuel_service import FuelService
+    from map import get_router, MAX_DIST_KM
+
+    worker = RefreshWorker()
+    # Startup loads inline once; later refreshes happen off the script thread
+    worker.add(parking_job(PARKING_CSV), initial=load_parking())
+    worker.add(fuel_job(FUEL_CSV), initial=FuelService())
+    worker.route_origins = RecentOrigins()
+    worker.add(routes_job(worker, get_router(), worker.route_origins, MAX_DIST_KM))
+    if REFRESH_ENABLED:
+        worker.start()
+    return worker
+
+
+def current_parking():
+    return get_refresh_worker().get("parking")
@@ -0,0 +1,110 @@
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Set to a file path to share results between processes on this machine
+RESULT_DB = os.environ.get("SMARTPARK_RESULT_DB", "")
+
+
+class ResultCache:
+    """Process-wide LRU of compact query results, with hit/miss counters.
+
+    Values are tuples of NumPy arrays. With a path, entries are also written
+    to a SQLite file so other worker processes can reuse them; that file is
+    trimmed to `disk_maxsize` rows, oldest first.
+    """
+
+    def __init__(self, maxsize=1024, path=RESULT_DB, disk_maxsize=20000):
+        self.maxsize = maxsize
+        self.disk_maxsize = disk_maxsize
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS results "
+                             "(key TEXT PRIMARY KEY, value BLOB, seq INTEGER)")
+            self._db.commit()
+
+    @staticmethod
+    def disk_key(key):
+        # Keys hold only plain values, so their repr is stable across processes
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            value = self._disk_get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, value)
+            return value
+
+    def put(self, key, value):
+        value = tuple(np.asarray(part) for part in value)
+        for part in value:
+            part.flags.writeable = False
+        with self._lock:
+            self._store(key, value)
+            self._disk_put(key, value)
+
+    def _store(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def _disk_get(self, key):
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT value FROM results WHERE key = ?", (self.disk_key(key),)).fetchone()
+        if row is None:
+            return None
+        with np.load(io.BytesIO(row[0])) as parts:
+            value = tuple(parts[f"arr_{i}"] for i in range(len(parts.files)))
+        for part in value:
+            part.flags.writeable = False
+        return value
+
+    def _disk_put(self, key, value):
+        if self._db is None:
+            return
+        buffer = io.BytesIO()
+        np.savez(buffer, *value)
+        self._db.execute("INSERT OR REPLACE INTO results VALUES "
+                         "(?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM results))",
+                         (self.disk_key(key), buffer.getvalue()))
+        self._db.execute("DELETE FROM results WHERE seq <= (SELECT MAX(seq) FROM results) - ?",
+                         (self.disk_maxsize,))
+        self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self):
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses,
+                "disk_hits": self.disk_hits}
+
+    def __len__(self):
+        return len(self._data)
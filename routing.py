@@ -0,0 +1,179 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from circuit import CircuitBreaker, CircuitOpen
+
+# Point this at a local OSRM (or benchmarks/stub_server.py) to run offline
+OSRM_URL = os.environ.get("OSRM_URL", "http://router.project-osrm.org")
+
+# The public OSRM demo server rejects table requests with more coordinates
+TABLE_MAX_COORDS = 100
+
+
+class RoutingError(Exception):
+    pass
+
+
+class RouteCache:
+    """Bounded LRU cache with a per-entry TTL, keyed on rounded coordinates."""
+
+    def __init__(self, maxsize=4096, ttl=6 * 3600, precision=5, negative_ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Unroutable pairs are remembered too, but retried sooner
+        self.negative_ttl = negative_ttl
+        self.precision = precision
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, origin, dest):
+        # 5 decimals is ~1 m, so reruns with the same location share entries
+        # float() first so float32 and float64 copies of a coordinate agree
+        p = self.precision
+        return tuple(round(float(v), p) for v in (origin[0], origin[1], dest[0], dest[1]))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if time.monotonic() > expires_at:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+UNROUTABLE = (None, None, None)
+
+
+class Router:
+    """OSRM client that dedupes, caches and batches route lookups.
+
+    Coordinates are passed as (lat, lon) tuples. Cached values are
+    (coords, distance_km, duration_min); coords is None when the entry came
+    from a table request that carries no geometry, and all three are None
+    for a pair the table found unroutable.
+    """
+
+    def __init__(self, base_url=OSRM_URL, cache=None, timeout=5, max_workers=8, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache if cache is not None else RouteCache()
+        # While OSRM is down, lookups fail at once instead of each waiting for the timeout
+        self.breaker = breaker if breaker is not None else CircuitBreaker("OSRM")
+        self.timeout = timeout
+        self.requests_made = 0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _get(self, path):
+        try:
+            res = self.breaker.call(self._request, path, errors=(requests.RequestException,))
+        except CircuitOpen as e:
+            raise RoutingError(str(e)) from e
+        try:
+            data = res.json()
+        except ValueError:
+            res.raise_for_status()
+            raise
+        if data.get("code") != "Ok":
+            # NoRoute, NoSegment, InvalidQuery...: OSRM answered, the query was bad
+            raise RoutingError(data.get("message", data.get("code")))
+        return data
+
+    def _request(self, path):
+        self.requests_made += 1
+        res = self.session.get(f"{self.base_url}{path}", timeout=self.timeout)
+        # Only timeouts, connection errors and 5xx count as an outage; OSRM
+        # answers unroutable queries with a 4xx that _get turns into RoutingError
+        if res.status_code >= 500:
+            res.raise_for_status()
+        return res
+
+    def _fetch_route(self, origin, dest):
+        path = (f"/route/v1/driving/{origin[1]},{origin[0]};{dest[1]},{dest[0]}"
+                "?overview=full&geometries=geojson")
+        r = self._get(path)["routes"][0]
+        coords = [(lat, lon) for lon, lat in r["geometry"]["coordinates"]]
+        return coords, r["distance"] / 1000, r["duration"] / 60
+
+    def _fetch_table(self, origin, dests):
+        coords = ";".join(f"{lon},{lat}" for lat, lon in [origin] + list(dests))
+        data = self._get(f"/table/v1/driving/{coords}?sources=0&annotations=distance,duration")
+        results = []
+        for dist, dur in zip(data["distances"][0][1:], data["durations"][0][1:]):
+            if dist is None or dur is None:
+                results.append(None)
+            else:
+                results.append((None, dist / 1000, dur / 60))
+        return results
+
+    def route(self, origin, dest):
+        """Full route with geometry for a single pair."""
+        key = self.cache.key(origin, dest)
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] is not None:
+            return cached
+        value = self._fetch_route(origin, dest)
+        self.cache.put(key, value)
+        return value
+
+    def summaries(self, origin, dests):
+        """(distance_km, duration_min) for each destination, None where unroutable.
+
+        Cache misses are deduplicated and resolved with OSRM table requests,
+        so a full result set costs at most one round trip per 99 garages.
+        """
+        keys = [self.cache.key(origin, d) for d in dests]
+        found = {}
+        missing = {}
+        for key, dest in zip(keys, dests):
+            if key in found or key in missing:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                found[key] = cached
+            else:
+                missing[key] = dest
+        missing_keys = list(missing)
+        step = TABLE_MAX_COORDS - 1
+        for i in range(0, len(missing_keys), step):
+            chunk = missing_keys[i:i + step]
+            values = self._fetch_table(origin, [missing[k] for k in chunk])
+            for key, value in zip(chunk, values):
+                if value is None:
+                    # Cached as well, or every rerun would ask for it again
+                    self.cache.put(key, UNROUTABLE, ttl=self.cache.negative_ttl)
+                    value = UNROUTABLE
+                else:
+                    self.cache.put(key, value)
+                found[key] = value
+        return [None if found[k][1] is None else found[k][1:] for k in keys]
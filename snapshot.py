@@ -0,0 +1,189 @@
+"""Columnar binary snapshots of the app's CSV sources.
+
+Each table is a directory of one .npy file per column plus meta.json, so a
+cold process memory-maps the columns instead of parsing CSV text. Rebuild
+after changing a CSV with:
+
+    python snapshot.py
+"""
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    # Strings are then decoded into Python objects on load
+    pa = None
+
+SNAPSHOT_DIR = os.environ.get("SMARTPARK_SNAPSHOT_DIR", ".snapshot")
+INDEX_COLUMN = "__index__"
+
+
+def _source_stamp(source):
+    if not os.path.exists(source):
+        # The snapshot is the only copy, e.g. of generated data
+        return {"path": os.path.abspath(source), "mtime_ns": None, "size": None}
+    st = os.stat(source)
+    return {"path": os.path.abspath(source), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def _replace(path, mode, write):
+    # Write next to the target and rename, so processes that already mmap
+    # the old file keep a consistent copy
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, mode) as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def _save_column(directory, name, values):
+    columns = {}
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        columns["codes"] = values.cat.codes.to_numpy()
+        meta = {"kind": "category", "categories": values.cat.categories.tolist()}
+    elif pd.api.types.is_datetime64_any_dtype(values.dtype):
+        array = values.to_numpy()
+        columns["values"] = array.view(np.int64)
+        meta = {"kind": "datetime", "dtype": str(array.dtype)}
+    elif pd.api.types.is_string_dtype(values.dtype):
+        # Arrow's layout: one UTF-8 buffer plus row offsets into it, which
+        # loads without copying and without padding every row to the longest
+        valid = values.notna().to_numpy()
+        encoded = [s.encode() for s in values[valid]]
+        lengths = np.zeros(len(values), dtype=np.int64)
+        lengths[valid] = [len(b) for b in encoded]
+        columns["offsets"] = np.concatenate([[0], np.cumsum(lengths)])
+        columns["data"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        if not valid.all():
+            columns["valid"] = valid
+        meta = {"kind": "string", "dtype": str(values.dtype)}
+    else:
+        columns["values"] = values.to_numpy()
+        meta = {"kind": "numeric"}
+    meta["parts"] = list(columns)
+    for part, array in columns.items():
+        _replace(os.path.join(directory, f"{name}.{part}.npy"), "wb",
+                 lambda f: np.save(f, np.ascontiguousarray(array)))
+    return meta
+
+
+def _load_strings(offsets, data, valid, dtype):
+    if pa is not None:
+        mask = None if valid is None else pa.py_buffer(np.packbits(valid, bitorder="little"))
+        array = pa.LargeStringArray.from_buffers(len(offsets) - 1, pa.py_buffer(offsets),
+                                                 pa.py_buffer(data), mask)
+        return pd.array(array, dtype=dtype)
+    data = data.tobytes()
+    values = np.array([data[start:end].decode() for start, end in zip(offsets[:-1], offsets[1:])],
+                      dtype=object)
+    if valid is not None:
+        values[~valid] = None
+    return pd.array(values, dtype=dtype)
+
+
+def _load_column(directory, name, meta):
+    def load(part):
+        # Plain ndarray view over the mapping, so pandas treats it like any array
+        return np.asarray(np.load(os.path.join(directory, f"{name}.{part}.npy"), mmap_mode="r"))
+
+    if meta["kind"] == "category":
+        return pd.Categorical.from_codes(load("codes"), categories=meta["categories"])
+    if meta["kind"] == "datetime":
+        return load("values").view(meta["dtype"])
+    if meta["kind"] == "string":
+        valid = load("valid") if "valid" in meta["parts"] else None
+        return _load_strings(load("offsets"), load("data"), valid, meta["dtype"])
+    return load("values")
+
+
+def write_snapshot(df, name, source, directory=SNAPSHOT_DIR):
+    target = os.path.join(directory, name)
+    os.makedirs(target, exist_ok=True)
+    columns = {}
+    if not isinstance(df.index, pd.RangeIndex):
+        columns[INDEX_COLUMN] = _save_column(target, INDEX_COLUMN, df.index.to_series())
+        columns[INDEX_COLUMN]["name"] = df.index.name
+    for col in df.columns:
+        columns[col] = _save_column(target, col, df[col])
+    meta = {"source": _source_stamp(source), "rows": len(df), "columns": columns}
+    _replace(os.path.join(target, "meta.json"), "w", lambda f: json.dump(meta, f))
+    # Drop column files an older layout or schema left behind
+    written = {f"{col}.{part}.npy" for col, col_meta in columns.items() for part in col_meta["parts"]}
+    for path in glob.glob(os.path.join(target, "*.npy")):
+        if os.path.basename(path) not in written:
+            os.remove(path)
+    return target
+
+
+def is_fresh(name, source, directory=SNAPSHOT_DIR):
+    """True if a snapshot exists and was built from the current source file."""
+    try:
+        with open(os.path.join(directory, name, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if not os.path.exists(source):
+        return True
+    stamp = _source_stamp(source)
+    return (meta["source"]["mtime_ns"], meta["source"]["size"]) == (stamp["mtime_ns"], stamp["size"])
+
+
+def read_snapshot(name, directory=SNAPSHOT_DIR):
+    target = os.path.join(directory, name)
+    with open(os.path.join(target, "meta.json")) as f:
+        meta = json.load(f)
+    columns = dict(meta["columns"])
+    index = None
+    if INDEX_COLUMN in columns:
+        index_meta = columns.pop(INDEX_COLUMN)
+        index = pd.Index(_load_column(target, INDEX_COLUMN, index_meta), name=index_meta.get("name"))
+    data = {col: _load_column(target, col, col_meta) for col, col_meta in columns.items()}
+    return pd.DataFrame(data, index=index, copy=False)
+
+
+def matches_schema(df, dtypes):
+    """True if df has every column of the {column: dtype name} mapping, with that dtype."""
+    return all(col in df.columns and str(df[col].dtype) == str(dtype) for col, dtype in dtypes.items())
+
+
+def load_or_read(name, source, read_csv, directory=SNAPSHOT_DIR, dtypes=None):
+    """Use the snapshot when it matches the source, otherwise parse the CSV.
+
+    A snapshot that doesn't match `dtypes`, e.g. one written before a
+    column was added or its dtype changed, is treated as stale. A stale
+    snapshot is rewritten from the parsed CSV, so only the first start
+    after a change pays for the parse.
+    """
+    if is_fresh(name, source, directory):
+        try:
+            df = read_snapshot(name, directory)
+        except (OSError, ValueError, KeyError):
+            pass
+        else:
+            if dtypes is None or matches_schema(df, dtypes):
+                return df
+    df = read_csv(source)
+    if os.path.exists(os.path.join(directory, name, "meta.json")):
+        try:
+            write_snapshot(df, name, source, directory)
+        except OSError:
+            # e.g. a read-only deployment; the CSV is still good to use
+            pass
+    return df
+
+
+def build(directory=SNAPSHOT_DIR):
+    from data import PARKING_CSV, FUEL_CSV, read_parking_csv, read_fuel_csv
+
+    for name, source, read_csv in [("parking", PARKING_CSV, read_parking_csv),
+                                   ("fuel", FUEL_CSV, read_fuel_csv)]:
+        path = write_snapshot(read_csv(source), name, source, directory)
+        print(f"{source} -> {path}")
+
+
+if __name__ == "__main__":
+    build()
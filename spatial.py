@@ -0,0 +1,86 @@
+import numpy as np
+
+from geo import haversine
+
+KM_PER_DEG_LAT = 111.2
+
+
+class GridIndex:
+    """Uniform lat/lon grid over garage coordinates.
+
+    Points are sorted by cell id, and cells in one grid row are numbered
+    contiguously, so a radius query only touches one sorted slice per grid
+    row crossed by its bounding box. Results are row positions (for
+    `df.iloc`) plus exact haversine distances.
+    """
+
+    def __init__(self, lats, lons, cell_km=2.0):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_km = cell_km
+        valid = np.flatnonzero(~(np.isnan(self.lats) | np.isnan(self.lons)))
+        # Longitude cells shrink towards the poles; size them for the widest latitude
+        max_abs_lat = np.abs(self.lats[valid]).max() if len(valid) else 0.0
+        self.dlat = cell_km / KM_PER_DEG_LAT
+        self.dlon = cell_km / (KM_PER_DEG_LAT * max(np.cos(np.radians(max_abs_lat)), 0.01))
+        self.ncols = int(np.ceil(360 / self.dlon)) + 1
+        cells = self._cell(self.lats[valid], self.lons[valid])
+        order = np.argsort(cells, kind="stable")
+        self.positions = valid[order]
+        self.cells = cells[order]
+
+    @classmethod
+    def from_frame(cls, df, cell_km=2.0):
+        return cls(df['lat'].to_numpy(), df['lon'].to_numpy(), cell_km=cell_km)
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _row(self, lat):
+        return np.floor((np.asarray(lat) + 90) / self.dlat).astype(np.int64)
+
+    def _col(self, lon):
+        return np.floor((np.asarray(lon) + 180) / self.dlon).astype(np.int64)
+
+    def _cell(self, lat, lon):
+        return self._row(lat) * self.ncols + self._col(lon)
+
+    def _candidates(self, lat, lon, radius_km):
+        dlat = radius_km / KM_PER_DEG_LAT
+        edge_lat = min(abs(lat) + dlat, 89.9)
+        dlon = radius_km / (KM_PER_DEG_LAT * np.cos(np.radians(edge_lat)))
+        col_lo = max(int(self._col(lon - dlon)), 0)
+        col_hi = min(int(self._col(lon + dlon)), self.ncols - 1)
+        rows = np.arange(self._row(lat - dlat), self._row(lat + dlat) + 1)
+        starts = np.searchsorted(self.cells, rows * self.ncols + col_lo, side="left")
+        ends = np.searchsorted(self.cells, rows * self.ncols + col_hi, side="right")
+        if not len(rows) or (ends - starts).sum() == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.positions[s:e] for s, e in zip(starts, ends) if e > s])
+
+    def within(self, lat, lon, radius_km):
+        """Positions and distances of points within radius_km, in position order."""
+        candidates = np.sort(self._candidates(lat, lon, radius_km))
+        dist = haversine(lat, lon, self.lats[candidates], self.lons[candidates])
+        keep = dist <= radius_km
+        return candidates[keep], dist[keep]
+
+    def nearest(self, lat, lon, k):
+        """Positions and distances of the k nearest points, closest first."""
+        k = min(k, len(self.positions))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        # Grow the search radius until it holds k points; anything outside
+        # the circle is farther than everything inside it
+        radius = self.cell_km
+        while True:
+            positions, dist = self.within(lat, lon, radius)
+            if len(positions) >= k or radius > 2 * np.pi * 6371:
+                break
+            radius *= 2
+        if len(positions) < k:
+            positions = self.positions
+            dist = haversine(lat, lon, self.lats[positions], self.lons[positions])
+        top = np.argpartition(dist, k - 1)[:k]
+        top = top[np.argsort(dist[top], kind="stable")]
+        return positions[top], dist[top]
@@ -0,0 +1,120 @@
+import pytest
+import requests
+
+import circuit
+from circuit import CircuitBreaker, CircuitOpen, with_retries
+
+
+class Upstream:
+    """Callable that fails a set number of times before answering."""
+
+    def __init__(self, failures, error=ConnectionError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error("down")
+        return "ok"
+
+
+@pytest.fixture
+def breaker(monkeypatch, clock):
+    monkeypatch.setattr(circuit, "time", clock)
+    return CircuitBreaker("upstream", threshold=3, reset_after=30)
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        with pytest.raises(ConnectionError):
+            breaker.call(Upstream(1), errors=(ConnectionError,))
+
+
+def test_opens_after_threshold_consecutive_failures(breaker):
+    fail(breaker, 2)
+    assert breaker.state == "closed"
+    fail(breaker, 1)
+    assert breaker.state == "open"
+    upstream = Upstream(0)
+    with pytest.raises(CircuitOpen):
+        breaker.call(upstream)
+    assert upstream.calls == 0
+
+
+def test_success_resets_the_failure_count(breaker):
+    fail(breaker, 2)
+    assert breaker.call(Upstream(0)) == "ok"
+    fail(breaker, 2)
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_trial_through(breaker, clock):
+    fail(breaker, 3)
+    clock.now += 30
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    # A second caller waits for the trial's outcome
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_reopens_at_once(breaker, clock):
+    fail(breaker, 3)
+    clock.now += 30
+    fail(breaker, 1)
+    assert breaker.state == "open"
+    clock.now += 29
+    with pytest.raises(CircuitOpen):
+        breaker.call(Upstream(0))
+
+
+def test_other_errors_do_not_count_but_free_the_trial(breaker, clock):
+    fail(breaker, 3)
+    clock.now += 30
+    with pytest.raises(KeyError):
+        breaker.call(Upstream(1, KeyError), errors=(ConnectionError,))
+    assert breaker.failures == 3
+    assert breaker.call(Upstream(0)) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_breaker_against_the_stub_server(stub_url, dead_url, monkeypatch, clock):
+    monkeypatch.setattr(circuit, "time", clock)
+    breaker = CircuitBreaker("stub", threshold=2, reset_after=5)
+    errors = (requests.RequestException,)
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            breaker.call(requests.get, f"{dead_url}/stats", timeout=5, errors=errors)
+    with pytest.raises(CircuitOpen):
+        breaker.call(requests.get, f"{stub_url}/stats", timeout=5, errors=errors)
+    clock.now += 5
+    assert breaker.call(requests.get, f"{stub_url}/stats", timeout=5, errors=errors).ok
+    assert breaker.state == "closed"
+
+
+def test_with_retries_backs_off_until_success(monkeypatch, clock):
+    monkeypatch.setattr(circuit, "time", clock)
+    upstream = Upstream(2)
+    assert with_retries(upstream, attempts=3, backoff=0.5, errors=(ConnectionError,)) == "ok"
+    assert upstream.calls == 3
+    assert clock.now == 1000.0 + 0.5 + 1.0
+
+
+def test_with_retries_gives_up_after_the_last_attempt(monkeypatch, clock):
+    monkeypatch.setattr(circuit, "time", clock)
+    upstream = Upstream(5)
+    with pytest.raises(ConnectionError):
+        with_retries(upstream, attempts=3, errors=(ConnectionError,))
+    assert upstream.calls == 3
+
+
+def test_with_retries_never_retries_an_open_circuit(monkeypatch, clock):
+    monkeypatch.setattr(circuit, "time", clock)
+    upstream = Upstream(5, CircuitOpen)
+    with pytest.raises(CircuitOpen):
+        with_retries(upstream, attempts=3)
+    assert upstream.calls == 1
+    assert clock.now == 1000.0
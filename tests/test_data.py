@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from data import PARKING_CSV, PARKING_SCHEMA, read_parking_csv
+from snapshot import load_or_read, read_snapshot, write_snapshot
+
+CSV = os.path.join(os.path.dirname(__file__), "..", PARKING_CSV)
+
+
+def test_fees_keep_the_prices_written_in_the_csv():
+    raw = pd.read_csv(CSV)
+    df = read_parking_csv(CSV)
+    assert [f"€{fee}/h" for fee in df['fee_per_hour']] == [f"€{fee}/h" for fee in raw['fee_per_hour']]
+
+
+def test_snapshot_with_an_old_schema_is_not_used(tmp_path):
+    old = read_parking_csv(CSV).astype({'fee_per_hour': 'float32'}).drop(columns='garage_key')
+    write_snapshot(old, "parking", CSV, str(tmp_path))
+    # Left over from the fixed-width string layout
+    np.save(tmp_path / "parking" / "name.values.npy", np.array(["Parkhaus"]))
+    loaded = load_or_read("parking", CSV, read_parking_csv, str(tmp_path), PARKING_SCHEMA)
+    assert str(loaded['fee_per_hour'].dtype) == 'float64'
+    assert 'garage_key' in loaded
+    # ...and replaced, so the next start maps it instead of parsing the CSV again
+    def no_csv(source):
+        raise AssertionError("CSV parsed again")
+    again = load_or_read("parking", CSV, no_csv, str(tmp_path), PARKING_SCHEMA)
+    pd.testing.assert_frame_equal(again, loaded)
+    assert not (tmp_path / "parking" / "name.values.npy").exists()
+
+
+def test_strings_round_trip_without_padding(tmp_path):
+    df = pd.DataFrame({
+        'name': pd.array(["Parkhaus Süd", None, "", "P" * 200], dtype="string"),
+        'plz': pd.array(["60311", "10115", None, "80331"], dtype="str"),
+    }, index=pd.Index(["a", "b", "c", "d"], name="key"))
+    write_snapshot(df, "strings", "missing.csv", str(tmp_path))
+    loaded = read_snapshot("strings", str(tmp_path))
+    pd.testing.assert_frame_equal(loaded, df)
+    # One byte per UTF-8 byte, not 200 code points per row
+    data = np.load(tmp_path / "strings" / "name.data.npy")
+    assert data.nbytes == len("Parkhaus Süd".encode()) + 200
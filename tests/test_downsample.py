@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pytest
+
+from data import read_fuel_csv
+from downsample import FramePyramid, SeriesPyramid, minmax_indices
+
+FUEL_CSV = os.path.join(os.path.dirname(__file__), "..", "fuel_price.csv")
+
+
+def test_minmax_indices_keeps_both_extremes_in_time_order():
+    values = np.array([3.0, 1.0, 5.0, 2.0, 0.0, 9.0, np.nan])
+    assert minmax_indices(values, 3).tolist() == [1, 2, 4, 5, 6]
+
+
+def test_spike_in_bucket_cut_by_range_start_survives():
+    # The bucket holding row 1002 has its max at row 1000, outside the range
+    values = np.zeros(10_000)
+    values[1000] = 20
+    values[1003] = 10
+    rows = SeriesPyramid(values).query(1002, 9000, 100)
+    assert values[rows].max() == 10
+    assert rows.min() == 1002 and rows.max() == 9000
+
+
+def test_spike_in_bucket_cut_by_range_end_survives():
+    values = np.zeros(10_000)
+    values[8998] = -7
+    values[9001] = -20
+    rows = SeriesPyramid(values).query(100, 8999, 100)
+    assert values[rows].min() == -7
+
+
+@pytest.mark.parametrize("max_points", [50, 200])
+def test_query_matches_pandas_min_max(max_points):
+    rng = np.random.default_rng(0)
+    df = read_fuel_csv(FUEL_CSV)
+    dates = df.index
+    pyramid = FramePyramid(df)
+    ranges = [(1036, 1383)] + [tuple(sorted(rng.integers(0, len(df), 2))) for _ in range(200)]
+    for lo, hi in ranges:
+        for fuel in df.columns:
+            x, y = pyramid.points(fuel, lo, hi, max_points)
+            expected = df[fuel].iloc[lo:hi + 1]
+            assert y.max() == expected.max(), (lo, hi, fuel)
+            assert y.min() == expected.min(), (lo, hi, fuel)
+            assert x[0] == dates[lo] and x[-1] == dates[hi]
+            # The edge slices add at most four points to the budget
+            assert len(y) <= max_points + 6
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecast import WINDOW, forecast_frame, trailing_window
+from fuel_stats import FuelStats
+
+FUELS = ['Super E10', 'Diesel', 'Super E5']
+
+
+def prices(freq, days=90):
+    """Prices rising 1 cent a day, sampled every `freq`."""
+    index = pd.date_range("2024-01-01", periods=days * 24 if freq == "h" else days, freq=freq)
+    elapsed = (index - index[0]) / pd.Timedelta("1D")
+    return pd.DataFrame({fuel: 1.7 + 0.1 * i + 0.01 * elapsed for i, fuel in enumerate(FUELS)}, index=index)
+
+
+@pytest.mark.parametrize("freq", ["D", "h"])
+def test_window_change_spans_thirty_days(freq):
+    df = prices(freq)
+    stats = FuelStats(df)
+    lo, hi = stats.positions("2024-01-01", "2024-03-01 23:00")
+    change, pct, label = stats.change(lo, hi, 'Diesel')
+    assert label == "30-Day Change"
+    assert change == pytest.approx(0.29)
+    base = df['Diesel'].iloc[hi] - 0.29
+    assert df['Diesel'].loc[df.index[hi] - pd.Timedelta(days=29)] == pytest.approx(base)
+    assert pct == pytest.approx(0.29 / base * 100)
+
+
+@pytest.mark.parametrize("freq", ["D", "h"])
+def test_short_range_reports_its_days(freq):
+    stats = FuelStats(prices(freq))
+    lo, hi = stats.positions("2024-02-01", "2024-02-10 23:00")
+    assert stats.days(lo, hi) == 10
+    assert stats.change(lo, hi, 'Diesel')[2] == "10-Day Change"
+
+
+def test_window_needs_thirty_days_of_history():
+    stats = FuelStats(prices("h", days=40))
+    assert np.isnan(stats.window_change[:29 * 24]).all()
+    assert not np.isnan(stats.window_change[29 * 24:]).any()
+
+
+def test_hourly_forecast_matches_daily():
+    daily, hourly = prices("D"), prices("h")
+    assert trailing_window(hourly).shape == (3, WINDOW)
+    expected = forecast_frame(daily, "2024-03-15")
+    result = forecast_frame(hourly, "2024-03-15 23:00")
+    # Each hourly day averages to its 11:30 price, just under half a cent above midnight
+    assert result.to_numpy() == pytest.approx(expected.to_numpy() + 0.01 * 23 / 48)
+    assert result.loc[1, 'Diesel'] == pytest.approx(1.8 + 0.01 * 75 + 0.01 * 23 / 48)
+
+
+def test_days_without_prices_are_gaps_in_the_window():
+    df = prices("D").drop(pd.date_range("2024-03-25", "2024-03-29"))
+    Y = trailing_window(df)
+    assert Y.shape == (3, WINDOW)
+    assert np.isnan(Y).sum() == 3 * 5
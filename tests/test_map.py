@@ -0,0 +1,35 @@
+import pandas as pd
+
+import map as parking_map
+
+DATA_KEY = ("v1", ("Frankfurt am Main",))
+
+
+def garages(fee):
+    return pd.DataFrame({
+        'garage_key': [11, 22], 'name': ['Nord', 'Süd'], 'address': ['A 1', 'B 2'],
+        'fee_per_hour': [fee, 2.0], 'distance': [0.4, 0.9], 'total_spots': [100, 50],
+        'ev_charging': [1, 0], 'lat': [50.11, 50.10], 'lon': [8.68, 8.67],
+    })
+
+
+def rendered(df, data_key):
+    m = parking_map.base_map(50.1, 8.68)
+    parking_map.garage_layer(50.1, 8.68, df, cluster=False, data_key=data_key).add_to(m)
+    return m.get_root().render()
+
+
+def test_markers_are_reused_within_one_data_version():
+    assert "€1.5/h" in rendered(garages(1.5), DATA_KEY)
+    # Same version, same garages: the cached popups are served
+    assert "€1.5/h" in rendered(garages(2.5), DATA_KEY)
+
+
+def test_refreshed_fees_reach_the_popups():
+    rendered(garages(1.5), DATA_KEY)
+    assert "€3.5/h" in rendered(garages(3.5), ("v2", DATA_KEY[1]))
+
+
+def test_markers_without_a_data_version_are_not_cached():
+    assert "€1.5/h" in rendered(garages(1.5), None)
+    assert "€4.5/h" in rendered(garages(4.5), None)
@@ -0,0 +1,64 @@
+import numpy as np
+
+from data import prepare_parking
+from occupancy import UNKNOWN, OccupancyStore, StubFeed, parse_lines, with_free_spots
+from synthetic import parking_frame
+
+NOW = 1_700_000_000.0
+
+
+def garages(n=200):
+    return prepare_parking(parking_frame(n))
+
+
+def test_garage_keys_survive_reordering():
+    df = garages()
+    shuffled = prepare_parking(parking_frame(200).sample(frac=1, random_state=1).reset_index(drop=True))
+    assert df['garage_key'].is_unique
+    assert set(df['garage_key']) == set(shuffled['garage_key'])
+    # garage_id is only the row position, which the shuffle changed
+    by_key = df.set_index('garage_key')['garage_id']
+    assert (by_key[shuffled['garage_key']].to_numpy() != shuffled['garage_id'].to_numpy()).any()
+
+
+def test_readings_follow_the_garage_after_a_reload_reorders_rows():
+    df = garages()
+    store = OccupancyStore(df['garage_key'])
+    key = df['garage_key'].iloc[5]
+    store.apply([key], [17], [NOW])
+    reloaded = df.iloc[::-1].reset_index(drop=True)
+    reloaded['garage_id'] = np.arange(len(reloaded), dtype=np.int32)
+    free = with_free_spots(reloaded, store, max_age=np.inf)['free_spots']
+    assert free[reloaded['garage_key'] == key].tolist() == [17]
+    assert (free[reloaded['garage_key'] != key] == UNKNOWN).all()
+
+
+def test_unknown_keys_are_ignored_until_tracked():
+    store = OccupancyStore([10, 20])
+    assert store.apply([10, 30], [1, 2], [NOW, NOW]) == 1
+    assert store.lookup([10, 20, 30], now=NOW).tolist() == [1, UNKNOWN, UNKNOWN]
+    store.track([20, 30], token="v2")
+    store.track([40], token="v2")
+    assert len(store) == 3
+    store.apply([30], [5], [NOW])
+    assert store.lookup([30, 10, 40], now=NOW).tolist() == [5, 1, UNKNOWN]
+
+
+def test_only_newer_fresh_readings_count():
+    store = OccupancyStore([7])
+    store.apply([7, 7], [3, 4], [NOW, NOW - 10])
+    assert store.lookup([7], now=NOW).tolist() == [3]
+    store.apply([7], [9], [NOW - 5])
+    assert store.lookup([7], now=NOW).tolist() == [3]
+    assert store.lookup([7], max_age=60, now=NOW + 61).tolist() == [UNKNOWN]
+
+
+def test_feeds_address_garages_by_key():
+    df = garages(50)
+    feed = StubFeed(df['garage_key'], df['total_spots'], updates_per_second=100, interval=0, seed=0)
+    keys, free, _ = next(iter(feed))
+    assert set(keys) <= set(df['garage_key'])
+    store = OccupancyStore(df['garage_key'])
+    lines = [f"{k},{f},{NOW}" for k, f in zip(keys, free)]
+    store.apply(*parse_lines(lines))
+    assert store.updates == len(set(keys))
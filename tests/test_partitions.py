@@ -0,0 +1,42 @@
+from data import prepare_parking
+from partitions import ParkingPartitions
+from synthetic import parking_frame
+
+
+def partitions(n=3000):
+    return ParkingPartitions(prepare_parking(parking_frame(n)))
+
+
+def test_city_scope_holds_only_that_citys_garages():
+    parts = partitions()
+    city = parts.cities()[0]
+    scope = parts.scope([city])
+    assert len(scope) == parts.catalog.loc[city, 'garages']
+    assert set(scope.frame['city'].astype(str)) == {city}
+    assert parts.loaded() == [city]
+
+
+def test_nationwide_scope_covers_every_garage_without_loading_partitions():
+    parts = partitions()
+    scope = parts.scope(parts.cities())
+    assert len(scope) == len(parts.frame)
+    assert parts.loaded() == []
+    lat, lon = parts.center(parts.cities()[-1])
+    positions, _ = scope.index.within(lat, lon, 5)
+    assert len(positions) > 0
+
+
+def test_scopes_are_shared_whatever_the_order_or_repeats():
+    parts = partitions()
+    a, b = parts.cities()[:2]
+    assert parts.scope([b, a, b]) is parts.scope([a, b])
+    assert parts.scope([a, b]).key == (None, (a, b))
+
+
+def test_around_reaches_across_city_borders():
+    parts = partitions()
+    city = parts.cities()[0]
+    lat, lon = parts.center(city)
+    assert city in parts.around(lat, lon, 1).cities
+    far = parts.around(lat, lon, 2000)
+    assert far.cities == tuple(parts.cities())
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+from pipeline import StagePipeline
+from result_cache import ResultCache
+
+GARAGES = pd.DataFrame({
+    'lat': np.linspace(50.0, 50.1, 40),
+    'lon': np.linspace(8.6, 8.7, 40),
+    'fee_per_hour': np.arange(40) % 5 + 0.5,
+})
+
+
+def distance_stage(df, lat, lon):
+    return df.assign(distance=np.hypot(df['lat'] - lat, df['lon'] - lon))
+
+
+def fee_stage(df, max_fee):
+    return df[df['fee_per_hour'] <= max_fee]
+
+
+def sort_stage(df, column):
+    return df.sort_values(column, kind="stable")
+
+
+def page_stage(df, page, size=10):
+    return df.iloc[(page - 1) * size:page * size]
+
+
+def session(cache):
+    # encode/decode as in map.py: row labels plus the computed distances
+    return StagePipeline([
+        ("distance", distance_stage),
+        ("fee", fee_stage),
+        ("sort", sort_stage),
+        ("page", page_stage),
+    ], shared=cache,
+        encode=lambda df: (df.index.to_numpy(), df['distance'].to_numpy()),
+        decode=lambda source, cached: source.loc[cached[0]].assign(distance=cached[1]))
+
+
+def query(lat=50.05, max_fee=3.0, column="distance", page=1):
+    args = {"distance": (lat, 8.65), "fee": (max_fee,), "sort": (column,), "page": (page,)}
+    keys = {"distance": (lat, 8.65), "fee": max_fee, "sort": column}
+    return args, keys
+
+
+def expected(lat=50.05, max_fee=3.0, column="distance", page=1):
+    return page_stage(sort_stage(fee_stage(distance_stage(GARAGES, lat, 8.65), max_fee), column), page)
+
+
+def test_sessions_share_a_cached_prefix():
+    cache = ResultCache(path="")
+    first, second = session(cache), session(cache)
+    first.run(GARAGES, *query())
+    assert first.recomputed == ["distance", "fee", "sort", "page"]
+    stages = second.run(GARAGES, *query())
+    assert second.shared_hits == ["sort"]
+    assert second.recomputed == ["page"]
+    pd.testing.assert_frame_equal(stages["page"], expected())
+    # Upstream outputs of a shared hit are not materialised
+    assert set(stages) == {"sort", "page"}
+
+
+def test_later_changes_reuse_upstream_results():
+    pipeline = session(ResultCache(path=""))
+    pipeline.run(GARAGES, *query())
+    stages = pipeline.run(GARAGES, *query(max_fee=2.0))
+    assert pipeline.recomputed == ["fee", "sort", "page"]
+    pd.testing.assert_frame_equal(stages["page"], expected(max_fee=2.0))
+    stages = pipeline.run(GARAGES, *query(max_fee=2.0, page=2))
+    assert pipeline.recomputed == ["page"]
+    assert pipeline.shared_hits == []
+    pd.testing.assert_frame_equal(stages["page"], expected(max_fee=2.0, page=2))
+
+
+def test_unchanged_query_recomputes_nothing():
+    pipeline = session(ResultCache(path=""))
+    first = pipeline.run(GARAGES, *query())
+    again = pipeline.run(GARAGES, *query())
+    assert pipeline.recomputed == [] and pipeline.shared_hits == []
+    assert again["page"] is first["page"]
+
+
+def test_evicted_intermediate_is_rebuilt():
+    cache = ResultCache(maxsize=1, path="")
+    first, second = session(cache), session(cache)
+    first.run(GARAGES, *query(max_fee=2.0))
+    first.run(GARAGES, *query(max_fee=3.0))
+    # The second session starts from the shared result and never saw the distances
+    second.run(GARAGES, *query(max_fee=3.0))
+    assert second.shared_hits == ["sort"]
+    # max_fee=2.0 was evicted, so the distance stage has to be rebuilt from the source
+    stages = second.run(GARAGES, *query(max_fee=2.0))
+    assert second.shared_hits == []
+    assert second.recomputed == ["distance", "fee", "sort", "page"]
+    pd.testing.assert_frame_equal(stages["page"], expected(max_fee=2.0))
+    pd.testing.assert_frame_equal(stages["distance"], distance_stage(GARAGES, 50.05, 8.65))
+
+
+def test_without_keys_nothing_is_shared():
+    cache = ResultCache(path="")
+    pipeline = session(cache)
+    args, _ = query()
+    pipeline.run(GARAGES, args)
+    assert len(cache) == 0
+    assert session(cache).run(GARAGES, args)["page"].equals(expected())
+
+
+def test_results_are_shared_through_the_sqlite_file(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    session(ResultCache(path=path)).run(GARAGES, *query())
+    # Another process: its own memory cache, the same file
+    cache = ResultCache(path=path)
+    pipeline = session(cache)
+    stages = pipeline.run(GARAGES, *query())
+    assert pipeline.shared_hits == ["sort"]
+    assert cache.disk_hits == 1
+    pd.testing.assert_frame_equal(stages["page"], expected())
@@ -0,0 +1,71 @@
+import io
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+from geocode import Geocoder, load_plz_centroids
+from data import read_parking_csv
+from postal_codes import PLZ_CSV, build_centroids, read_geonames
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# GeoNames layout: country, plz, place, admin names and codes, lat, lon, accuracy
+SAMPLE = "\n".join("\t".join(row) for row in [
+    ["DE", "60311", "Frankfurt am Main", "Hessen", "HE", "", "00", "", "06412", "50.1100", "8.6800", "4"],
+    ["DE", "01945", "Guteborn", "Brandenburg", "BB", "", "00", "", "12066", "51.4000", "13.9000", "4"],
+    ["DE", "01945", "Hohenbocka", "Brandenburg", "BB", "", "00", "", "12066", "51.4400", "14.0200", "4"],
+    ["DE", "0194", "broken", "", "", "", "", "", "", "51.0", "14.0", ""],
+    ["AT", "60311", "elsewhere", "", "", "", "", "", "", "47.0", "13.0", ""],
+]) + "\n"
+
+
+def test_shared_postal_codes_get_the_mean_position():
+    centroids = build_centroids(read_geonames(io.StringIO(SAMPLE)))
+    assert centroids['plz'].tolist() == ["01945", "60311"]
+    assert centroids.iloc[0][['lat', 'lon']].tolist() == pytest.approx([51.42, 13.96])
+
+
+def test_reads_the_geonames_archive(tmp_path):
+    path = tmp_path / "DE.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("DE.txt", SAMPLE)
+        archive.writestr("readme.txt", "GeoNames")
+    assert len(build_centroids(read_geonames(str(path)))) == 2
+
+
+def test_table_overrides_garage_means_and_keeps_leading_zeros(tmp_path):
+    path = tmp_path / "plz_centroids.csv"
+    build_centroids(read_geonames(io.StringIO(SAMPLE))).to_csv(path, index=False)
+    garages = pd.DataFrame({'postal_code': ["60311", "10115"], 'lat': [50.0, 52.5], 'lon': [8.0, 13.4]})
+    centroids = load_plz_centroids(str(path), garages)
+    assert centroids["60311"] == pytest.approx((50.11, 8.68))
+    assert centroids["01945"] == pytest.approx((51.42, 13.96))
+    # Postal codes missing from the table still resolve from the garages
+    assert centroids["10115"] == pytest.approx((52.5, 13.4))
+    result = Geocoder(cache=None, plz_centroids=centroids).geocode(" 01945 ")
+    assert (result.lat, result.source) == (pytest.approx(51.42), "postal code table")
+
+
+class NoRemote(Geocoder):
+    def _remote(self, query):
+        raise AssertionError(f"{query} went to Nominatim")
+
+
+def test_shipped_table_covers_germany():
+    table = pd.read_csv(os.path.join(ROOT, PLZ_CSV), dtype={'plz': str})
+    assert len(table) > 8000 and table['plz'].is_unique
+    assert table['plz'].str.fullmatch(r"\d{5}").all()
+    assert table['lat'].between(47.2, 55.1).all() and table['lon'].between(5.8, 15.1).all()
+
+
+def test_postal_code_without_garages_resolves_offline():
+    garages = read_parking_csv(os.path.join(ROOT, "parking_data.csv"))
+    assert "10115" not in set(garages['postal_code'])
+    geocoder = NoRemote(cache=None, plz_centroids=load_plz_centroids(os.path.join(ROOT, PLZ_CSV), garages))
+    result = geocoder.geocode("10115")
+    assert result.source == "postal code table"
+    # Berlin-Mitte
+    assert (result.lat, result.lon) == pytest.approx((52.53, 13.38), abs=0.02)
+    assert geocoder.remote_calls == 0
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from result_cache import ResultCache
+
+KEY = (("distance", ("v1", 50.1109, 8.6821)), ("radius", 5.0))
+
+
+def result(n=3):
+    return np.arange(n), np.linspace(0.1, 1.0, n)
+
+
+def test_hits_are_read_only_and_counted():
+    cache = ResultCache(path="")
+    assert cache.get(KEY) is None
+    cache.put(KEY, result())
+    labels, distances = cache.get(KEY)
+    np.testing.assert_array_equal(labels, np.arange(3))
+    with pytest.raises(ValueError):
+        distances[0] = 0
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "disk_hits": 0}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(maxsize=2, path="")
+    cache.put("a", result())
+    cache.put("b", result())
+    cache.get("a")
+    cache.put("c", result())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_sqlite_file_shares_results_between_processes(tmp_path):
+    path = str(tmp_path / "results" / "cache.sqlite")
+    ResultCache(path=path).put(KEY, result())
+    # A second instance on the same file stands in for another worker process
+    other = ResultCache(path=path)
+    labels, distances = other.get(KEY)
+    np.testing.assert_array_equal(labels, np.arange(3))
+    np.testing.assert_allclose(distances, result()[1])
+    assert not distances.flags.writeable
+    assert other.stats()["disk_hits"] == 1
+    # Now also held in memory
+    other.get(KEY)
+    assert other.stats()["disk_hits"] == 1
+
+
+def test_sqlite_file_is_trimmed_oldest_first(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path=path, disk_maxsize=2)
+    for key in "abc":
+        cache.put(key, result())
+    other = ResultCache(path=path)
+    assert other.get("a") is None
+    assert other.get("b") is not None and other.get("c") is not None
+
+
+def test_clear_empties_memory_and_disk(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path=path)
+    cache.put(KEY, result())
+    cache.clear()
+    assert len(cache) == 0
+    assert ResultCache(path=path).get(KEY) is None
@@ -0,0 +1,150 @@
+import pytest
+import requests
+
+import routing
+from circuit import CircuitBreaker
+from routing import TABLE_MAX_COORDS, RouteCache, Router, RoutingError
+
+ORIGIN = (50.1109, 8.6821)
+DEST = (50.1155, 8.6724)
+
+
+def destinations(n):
+    return [(50.0 + i * 0.001, 8.6 + i * 0.001) for i in range(n)]
+
+
+def test_route_is_fetched_once_then_cached(stub_url):
+    router = Router(stub_url)
+    coords, km, minutes = router.route(ORIGIN, DEST)
+    assert coords[0] == pytest.approx(ORIGIN) and coords[-1] == pytest.approx(DEST)
+    assert km > 0 and minutes > 0
+    assert router.route(ORIGIN, DEST) == (coords, km, minutes)
+    assert router.requests_made == 1
+    assert (router.cache.hits, router.cache.misses) == (1, 1)
+
+
+def test_nearby_coordinates_share_a_cache_entry(stub_url):
+    router = Router(stub_url)
+    router.route(ORIGIN, DEST)
+    router.route((ORIGIN[0] + 1e-7, ORIGIN[1]), DEST)
+    assert router.requests_made == 1
+
+
+def test_summaries_batch_misses_into_table_requests(stub_url):
+    router = Router(stub_url)
+    dests = destinations(2 * (TABLE_MAX_COORDS - 1) + 10)
+    summaries = router.summaries(ORIGIN, dests)
+    assert router.requests_made == 3
+    assert len(summaries) == len(dests)
+    assert all(km > 0 and minutes > 0 for km, minutes in summaries)
+    # Everything is cached now, and duplicates never cost a request
+    assert router.summaries(ORIGIN, dests + dests[:5]) == summaries + summaries[:5]
+    assert router.requests_made == 3
+
+
+def test_summaries_only_fetch_the_misses(stub_url):
+    router = Router(stub_url)
+    router.summaries(ORIGIN, destinations(5))
+    router.summaries(ORIGIN, destinations(8))
+    assert router.requests_made == 2
+    assert router.cache.misses == 8
+
+
+def test_route_fetches_geometry_for_table_entries(stub_url):
+    router = Router(stub_url)
+    [(km, minutes)] = router.summaries(ORIGIN, [DEST])
+    coords, route_km, route_minutes = router.route(ORIGIN, DEST)
+    assert coords is not None
+    assert (route_km, route_minutes) == pytest.approx((km, minutes))
+    assert router.requests_made == 2
+
+
+def test_cache_entries_expire_after_ttl(monkeypatch, clock):
+    monkeypatch.setattr(routing, "time", clock)
+    cache = RouteCache(ttl=60)
+    key = cache.key(ORIGIN, DEST)
+    cache.put(key, "value")
+    clock.now += 60
+    assert cache.get(key) == "value"
+    clock.now += 1
+    assert cache.get(key) is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_route_is_fetched_again(stub_url, monkeypatch, clock):
+    monkeypatch.setattr(routing, "time", clock)
+    router = Router(stub_url, cache=RouteCache(ttl=60))
+    router.route(ORIGIN, DEST)
+    clock.now += 30
+    router.route(ORIGIN, DEST)
+    assert router.requests_made == 1
+    clock.now += 31
+    router.route(ORIGIN, DEST)
+    assert router.requests_made == 2
+
+
+def test_cache_evicts_least_recently_used():
+    cache = RouteCache(maxsize=2)
+    a, b, c = (cache.key(ORIGIN, d) for d in destinations(3))
+    cache.put(a, 1)
+    cache.put(b, 2)
+    cache.get(a)
+    cache.put(c, 3)
+    assert cache.get(b) is None
+    assert (cache.get(a), cache.get(c)) == (1, 3)
+
+
+OUTSIDE = (48.85, 2.35)
+
+
+def test_osrm_error_answers_carry_its_message(stub_url):
+    router = Router(stub_url)
+    with pytest.raises(RoutingError, match="Impossible route"):
+        router.route(ORIGIN, OUTSIDE)
+    with pytest.raises(RoutingError, match="/nearest"):
+        router._get("/nearest/v1/driving/8.6,50.1")
+
+
+def test_unroutable_queries_leave_the_breaker_closed(stub_url):
+    router = Router(stub_url, breaker=CircuitBreaker("OSRM", threshold=3))
+    for _ in range(5):
+        with pytest.raises(RoutingError):
+            router.route(ORIGIN, OUTSIDE)
+    assert router.breaker.state == "closed"
+    assert router.route(ORIGIN, DEST)[0] is not None
+    assert router.requests_made == 6
+
+
+def test_server_errors_open_the_breaker(stub_url):
+    router = Router(stub_url, breaker=CircuitBreaker("OSRM", threshold=2))
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            router._get("/unavailable")
+    assert router.breaker.state == "open"
+    with pytest.raises(RoutingError, match="unavailable"):
+        router.route(ORIGIN, DEST)
+    assert router.requests_made == 2
+
+
+def test_open_breaker_fails_fast_without_requests(dead_url):
+    router = Router(dead_url, breaker=CircuitBreaker("OSRM", threshold=2))
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            router.route(ORIGIN, DEST)
+    with pytest.raises(RoutingError):
+        router.summaries(ORIGIN, [DEST])
+    assert router.requests_made == 2
+
+
+def test_unroutable_summaries_are_cached_for_a_shorter_time(stub_url, monkeypatch, clock):
+    monkeypatch.setattr(routing, "time", clock)
+    router = Router(stub_url, cache=RouteCache(ttl=3600, negative_ttl=60))
+    summaries = router.summaries(ORIGIN, [DEST, OUTSIDE])
+    assert summaries[0] is not None and summaries[1] is None
+    assert router.summaries(ORIGIN, [DEST, OUTSIDE]) == summaries
+    assert router.requests_made == 1
+    clock.now += 61
+    assert router.summaries(ORIGIN, [DEST, OUTSIDE]) == summaries
+    assert router.requests_made == 2
+    assert router.cache.misses == 3
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+AVG_SPEED_KMH = 30
+CO2_KG_PER_KM = 0.120
+# German national CO2 price, 55 €/t
+CO2_EUR_PER_KG = 0.055
+
+
+class TripCosts:
+    """Cost components for every (scenario, garage) pair.
+
+    Scenario parameters broadcast against each other (scalars or arrays of
+    length s), garage columns have length g, and every component below is an
+    (s, g) array. The drive is a round trip of the trip distance plus the
+    garage's distance from the user.
+    """
+
+    def __init__(self, fees, distances, trip_distance, duration, fuel_price, consumption,
+                 time_value, co2_price=CO2_EUR_PER_KG, speed=AVG_SPEED_KMH):
+        def scenario(value):
+            return np.atleast_1d(np.asarray(value, dtype=np.float64))[:, None]
+
+        fees = np.asarray(fees, dtype=np.float64)[None, :]
+        drive_km = 2 * (scenario(trip_distance) + np.asarray(distances, dtype=np.float64)[None, :])
+        self.drive_km = drive_km
+        self.fuel = drive_km * scenario(consumption) / 100 * scenario(fuel_price)
+        self.parking = fees * scenario(duration)
+        self.time = drive_km / speed * scenario(time_value)
+        self.co2_kg = drive_km * CO2_KG_PER_KM
+        self.co2 = self.co2_kg * scenario(co2_price)
+        self.total = self.fuel + self.parking + self.time + self.co2
+
+    def cheapest(self, k=5):
+        """(s, k) garage positions of the k lowest totals per scenario, cheapest first."""
+        k = min(k, self.total.shape[1])
+        if k == 0:
+            return np.empty((self.total.shape[0], 0), dtype=np.intp)
+        part = np.argpartition(self.total, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(self.total, part, axis=1).argsort(axis=1, kind="stable")
+        return np.take_along_axis(part, order, axis=1)
+
+
+def trip_costs(df, scenarios, **kwargs):
+    """TripCosts for the garages in df under each row of the scenarios frame.
+
+    scenarios has trip_distance, duration, fuel_price, consumption and
+    time_value columns; df needs fee_per_hour and distance.
+    """
+    return TripCosts(df['fee_per_hour'].to_numpy(), df['distance'].to_numpy(),
+                     scenarios['trip_distance'].to_numpy(), scenarios['duration'].to_numpy(),
+                     scenarios['fuel_price'].to_numpy(), scenarios['consumption'].to_numpy(),
+                     scenarios['time_value'].to_numpy(), **kwargs)
+
+
+def best_garages(df, scenarios, k=5, **kwargs):
+    """Long frame of the k cheapest garages per scenario row."""
+    costs = trip_costs(df, scenarios, **kwargs)
+    picks = costs.cheapest(k)
+    rows = np.repeat(np.arange(len(scenarios)), picks.shape[1])
+    cols = picks.ravel()
+    return pd.DataFrame({
+        'scenario': scenarios.index.to_numpy()[rows],
+        'rank': np.tile(np.arange(1, picks.shape[1] + 1), len(scenarios)),
+        'garage_id': df['garage_id'].to_numpy()[cols],
+        'name': df['name'].to_numpy()[cols],
+        'total': costs.total[rows, cols],
+        'fuel': costs.fuel[rows, cols],
+        'parking': costs.parking[rows, cols],
+        'time': costs.time[rows, cols],
+        'co2_kg': costs.co2_kg[rows, cols],
+    })
+
+
+def best_garage_tables(df, scenarios, k=5, **kwargs):
+    """best_garages for each city in df, keyed by city name."""
+    return {city: best_garages(group, scenarios, k, **kwargs)
+            for city, group in df.groupby('city', observed=True)}